@@ -0,0 +1,57 @@
+from pyqtgraph import PlotCurveItem
+
+from EnvelopePyramid import EnvelopePyramid
+from PagedEnvelopePyramid import PagedEnvelopePyramid
+from PagedTraces import PagedChannel
+from TimeAxis import TimeAxis
+
+
+class EnvelopeCurveItem(PlotCurveItem):
+    """
+    Trace curve that only holds the points of its EnvelopePyramid for the current view range and width,
+    with their timestamps taken from a TimeAxis, while reporting the bounds of the pyramid's auto range
+    """
+    DEFAULT_WIDTH = 2000
+
+    def __init__(self, **kwargs):
+        PlotCurveItem.__init__(self, **kwargs)
+        self.time_axis = None
+        self.pyramid = None
+        self.shown_range = None
+
+    def setTrace(self, time_axis: TimeAxis, y):
+        self.time_axis = time_axis
+        self.pyramid = PagedEnvelopePyramid(y) if isinstance(y, PagedChannel) else EnvelopePyramid(y)
+        self.shown_range = None
+        self.updateView()
+
+    def updateView(self):
+        if self.pyramid is None or len(self.time_axis) == 0:
+            return
+        view_box = self.getViewBox()
+        if view_box is None:
+            left, right, width = self.time_axis.start, self.time_axis.end, self.DEFAULT_WIDTH
+        else:
+            (left, right), width = view_box.viewRange()[0], int(view_box.width()) or self.DEFAULT_WIDTH
+        first, last = self.time_axis.index_range(left, right)
+        indexes, values = self.pyramid.get_points(first, last, width)
+        shown_range = (indexes[0], indexes[-1], len(indexes)) if len(indexes) > 0 else None
+        if shown_range != self.shown_range:
+            self.shown_range = shown_range
+            self.setData(self.time_axis.timestamps(indexes), values, connect="finite")
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        if self.pyramid is None or len(self.time_axis) == 0:
+            return None, None
+        if ax == 0:
+            first, last = self.pyramid.auto_range()
+            return tuple(self.time_axis.timestamps([first, last - 1]))
+        return self.pyramid.bounds()
+
+    def viewRangeChanged(self):
+        PlotCurveItem.viewRangeChanged(self)
+        self.updateView()
+
+    def viewTransformChanged(self):
+        PlotCurveItem.viewTransformChanged(self)
+        self.updateView()
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class EnvelopePyramid:
+    """
+    Positions of the minimum and maximum of one trace in bins of BASE_BIN * FACTOR ** level samples, so that any
+    range of the trace can be drawn with a few points per pixel column, every extreme at its own sample
+    """
+    BASE_BIN = 8
+    FACTOR = 4
+    MIN_BINS = 256
+
+    def __init__(self, values):
+        self.values = np.asarray(values)
+        self.levels = []
+        minimum_indexes = maximum_indexes = np.arange(len(self.values))
+        bin_size, factor = 1, self.BASE_BIN
+        while len(minimum_indexes) // factor >= self.MIN_BINS:
+            minimum_indexes = self.__reduce(minimum_indexes, factor, np.argmin)
+            maximum_indexes = self.__reduce(maximum_indexes, factor, np.argmax)
+            bin_size *= factor
+            self.levels.append((bin_size, minimum_indexes, maximum_indexes))
+            factor = self.FACTOR
+
+    def __reduce(self, indexes, factor, arg_function):
+        padding = -len(indexes) % factor
+        indexes = np.concatenate((indexes, np.repeat(indexes[-1:], padding))).reshape(-1, factor)
+        chosen = arg_function(self.values[indexes], axis=1)
+        return indexes[np.arange(len(indexes)), chosen]
+
+    def auto_range(self):
+        return 0, len(self.values)
+
+    def bounds(self):
+        if len(self.values) == 0:
+            return None, None
+        if not self.levels:
+            return float(np.min(self.values)), float(np.max(self.values))
+        _, minimum_indexes, maximum_indexes = self.levels[-1]
+        return float(np.min(self.values[minimum_indexes])), float(np.max(self.values[maximum_indexes]))
+
+    def get_range(self, first, last):
+        """
+        Minimum and maximum of samples [first, last), or None for an empty range. Like a segment tree query:
+        every level covers the unaligned ends of the range with at most a bin factor of its bins
+        """
+        first, last = max(int(first), 0), min(int(last), len(self.values))
+        if first >= last:
+            return None
+        minimums, maximums = [], []
+        low, high = first, last
+        for level in range(len(self.levels) + 1):
+            if level == len(self.levels):
+                self.__add_extremes(level, low, high, minimums, maximums)
+                break
+            factor = self.levels[level][0] // (self.levels[level - 1][0] if level > 0 else 1)
+            aligned_low = min(-(-low // factor) * factor, high)
+            aligned_high = max(high // factor * factor, aligned_low)
+            self.__add_extremes(level, low, aligned_low, minimums, maximums)
+            self.__add_extremes(level, aligned_high, high, minimums, maximums)
+            low, high = aligned_low // factor, aligned_high // factor
+            if low >= high:
+                break
+        return float(min(minimums)), float(max(maximums))
+
+    def __add_extremes(self, level, low, high, minimums, maximums):
+        if low >= high:
+            return
+        if level == 0:
+            minimums.append(np.min(self.values[low:high]))
+            maximums.append(np.max(self.values[low:high]))
+        else:
+            _, minimum_indexes, maximum_indexes = self.levels[level - 1]
+            minimums.append(np.min(self.values[minimum_indexes[low:high]]))
+            maximums.append(np.max(self.values[maximum_indexes[low:high]]))
+
+    def get_points(self, first, last, width):
+        """
+        Sample indexes and values covering samples [first, last) for a view width pixels wide: raw samples when
+        zoomed in, otherwise the minimum and maximum of every bin of the coarsest level with two bins per pixel
+        """
+        first, last = max(int(first), 0), min(int(last), len(self.values))
+        samples_per_pixel = (last - first) / max(width, 1)
+        level = None
+        for bin_size, minimum_indexes, maximum_indexes in self.levels:
+            if 2 * bin_size <= samples_per_pixel:
+                level = (bin_size, minimum_indexes, maximum_indexes)
+        if level is None:
+            return np.arange(first, last), self.values[first:last]
+
+        bin_size, minimum_indexes, maximum_indexes = level
+        first_bin, last_bin = first // bin_size, -(-last // bin_size)
+        minimum_indexes = minimum_indexes[first_bin:last_bin]
+        maximum_indexes = maximum_indexes[first_bin:last_bin]
+        indexes = np.empty(2 * len(minimum_indexes), dtype=minimum_indexes.dtype)
+        indexes[0::2] = np.minimum(minimum_indexes, maximum_indexes)
+        indexes[1::2] = np.maximum(minimum_indexes, maximum_indexes)
+        return indexes, self.values[indexes]
@@ -30,6 +30,10 @@ class FilterDialog(QDialog):
 
         self._on_radio_button_clicked(self.ui.radioButton)
 
+    @property
+    def zero_phase(self):
+        return self.ui.zero_phase_chkbox.isChecked()
+
     def _on_radio_button_clicked(self, button):
         self.filter_type = self.type_by_button[button]
         if self.filter_type in ["bandpass", "bandstop"]:
@@ -0,0 +1,64 @@
+import itertools
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class FilterWorker(QThread):
+    """
+    Applies one filter to a batch of Seismograms in a pool of threads, off the GUI thread. sosfilt and
+    sosfiltfilt release the GIL, so the seismograms of a batch are filtered in parallel, and the filter
+    is designed once for all of them. Other changes of the filters, like undoing one or switching one off,
+    run here too, since a stage missing from the cache is filtered again
+    """
+    seismogram_filtered = pyqtSignal(int, int)
+    seismogram_failed = pyqtSignal(int, int, str)
+    progress_changed = pyqtSignal(int, int, int)
+    job_finished = pyqtSignal(int)
+
+    def __init__(self, max_workers=None, parent=None):
+        QThread.__init__(self, parent)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.jobs = queue.Queue()
+        self.job_ids = itertools.count(1)
+
+    def submit(self, seismograms, edit):
+        """
+        Runs edit(seismogram) on every seismogram, then evaluates its traces with the filters it leaves
+        """
+        job_id = next(self.job_ids)
+        self.jobs.put((job_id, list(seismograms), edit))
+        return job_id
+
+    def stop(self):
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                self.__run_job(executor, *job)
+
+    def __run_job(self, executor, job_id, seismograms, edit):
+        futures = {executor.submit(FilterWorker.__filter, seismogram, edit): index
+                   for index, seismogram in enumerate(seismograms)}
+        for seismograms_done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            try:
+                future.result()
+                self.seismogram_filtered.emit(job_id, index)
+            except Exception as error:
+                self.seismogram_failed.emit(job_id, index, str(error))
+            self.progress_changed.emit(job_id, seismograms_done, len(seismograms))
+        self.job_finished.emit(job_id)
+
+    @staticmethod
+    def __filter(seismogram, edit):
+        edit(seismogram)
+        # the edit only changes the pipeline, evaluating it runs the filters here
+        return seismogram.snapshot()
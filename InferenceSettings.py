@@ -0,0 +1,56 @@
+import json
+import os
+
+from ModelParameters import ModelParameters
+
+
+class InferenceSettings:
+    """
+    Batch size and TensorFlow thread pools for this machine, the thread pools tuned by resources/tune_inference.py.
+    Zero threads means the TensorFlow default. The batch size changes the probabilities, since MaxABSScaler
+    normalizes over a whole batch, so the tuner leaves it at BATCH_SIZE
+    """
+    SETTINGS_PATH = "inference_settings.json"
+
+    def __init__(self, batch_size=ModelParameters.BATCH_SIZE, intra_op_threads=0, inter_op_threads=0,
+                 windows_per_second=None):
+        self.batch_size = batch_size
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.windows_per_second = windows_per_second
+
+    @staticmethod
+    def load(file_path=SETTINGS_PATH):
+        if not os.path.exists(file_path):
+            return InferenceSettings()
+        try:
+            with open(file_path) as file:
+                settings = InferenceSettings(**json.load(file))
+            if settings.batch_size != ModelParameters.BATCH_SIZE:
+                print(f"{file_path}: batch size {settings.batch_size} instead of {ModelParameters.BATCH_SIZE}, "
+                      f"the probabilities differ from those of the default batch size")
+            return settings
+        except (OSError, TypeError, ValueError) as error:
+            print(f"{file_path} ignored: {error}")
+            return InferenceSettings()
+
+    def save(self, file_path=SETTINGS_PATH):
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(vars(self), file, indent=4)
+        os.replace(temp_path, file_path)
+
+    def apply(self):
+        """
+        Sets the thread pools; has to run before tensorflow executes its first operation
+        """
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(self.intra_op_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(self.inter_op_threads)
+
+    def describe(self):
+        if self.windows_per_second is None:
+            return f"пакет {self.batch_size}, потоки по умолчанию (не настроено)"
+        threads = "/".join(str(count) if count > 0 else "авто"
+                           for count in (self.intra_op_threads, self.inter_op_threads))
+        return f"пакет {self.batch_size}, потоки {threads}, {self.windows_per_second:.0f} окон/с"
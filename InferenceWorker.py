@@ -0,0 +1,119 @@
+import itertools
+import queue
+import threading
+import time
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class InferenceJob:
+    def __init__(self, job_id, seismograms):
+        self.job_id = job_id
+        self.seismograms = seismograms
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+
+class InferenceWorker(QThread):
+    """
+    Loads NeuralNetworkModel and runs its predictions off the GUI thread, one queued job at a time.
+    tensorflow is only imported here, by model_factory, so the window shows up before the model is ready
+    """
+    model_loaded = pyqtSignal(object, str)
+    model_failed = pyqtSignal(str)
+    job_started = pyqtSignal(int, int)
+    progress_changed = pyqtSignal(int, int)
+    prediction_ready = pyqtSignal(int, int, object, object, object)
+    job_finished = pyqtSignal(int, bool)
+    job_failed = pyqtSignal(int, str)
+
+    def __init__(self, model_factory, parent=None):
+        QThread.__init__(self, parent)
+        self.model_factory = model_factory
+        self.model = None
+        self.load_error = None
+        self.jobs = queue.Queue()
+        self.pending_jobs = {}
+        self.job_ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def submit(self, seismograms):
+        job = InferenceJob(next(self.job_ids), list(seismograms))
+        with self.lock:
+            self.pending_jobs[job.job_id] = job
+        self.jobs.put(job)
+        return job.job_id
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.pending_jobs.get(job_id)
+        if job:
+            job.cancel()
+
+    def cancel_all(self):
+        with self.lock:
+            jobs = list(self.pending_jobs.values())
+        for job in jobs:
+            job.cancel()
+
+    def has_pending_jobs(self):
+        with self.lock:
+            return len(self.pending_jobs) > 0
+
+    def stop(self):
+        self.cancel_all()
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        self.__load_model()
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            self.__run_job(job)
+            with self.lock:
+                self.pending_jobs.pop(job.job_id, None)
+
+    def __load_model(self):
+        start_time = time.perf_counter()
+        try:
+            self.model = self.model_factory()
+            self.model.warm_up()
+        except Exception as error:
+            self.load_error = str(error)
+            self.model_failed.emit(self.load_error)
+            return
+        timings = ", ".join(f"{stage} {seconds:.2f} s" for stage, seconds in self.model.startup_timings.items())
+        self.model_loaded.emit(self.model, f"model loaded in {time.perf_counter() - start_time:.2f} s ({timings})")
+
+    def __run_job(self, job: InferenceJob):
+        if job.is_cancelled():
+            self.job_finished.emit(job.job_id, True)
+            return
+        if self.model is None:
+            self.job_failed.emit(job.job_id, self.load_error)
+            return
+
+        from NeuralNetworkModel import ProgressCallback, InferenceCancelled
+
+        self.job_started.emit(job.job_id, len(job.seismograms))
+        callback = ProgressCallback(lambda percentage: self.progress_changed.emit(job.job_id, percentage),
+                                    job.is_cancelled)
+        try:
+            predictions = self.model.get_predictions(job.seismograms, callbacks=[callback])
+        except InferenceCancelled:
+            self.job_finished.emit(job.job_id, True)
+            return
+        except Exception as error:
+            self.job_failed.emit(job.job_id, str(error))
+            return
+        for index, (prediction, p_der_indexes, s_der_indexes) in enumerate(predictions):
+            self.prediction_ready.emit(job.job_id, index, prediction, p_der_indexes, s_der_indexes)
+        self.job_finished.emit(job.job_id, False)
+
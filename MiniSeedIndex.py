@@ -0,0 +1,201 @@
+import calendar
+import contextlib
+import io
+import mmap
+import os
+import struct
+
+import numpy as np
+import obspy
+
+
+class MiniSeedIndex:
+    """
+    Fixed headers of every record of a MiniSEED file: stream id, start, end, sampling rate and byte range.
+    The file is scanned once per version and the index is cached next to it, keyed by the file's mtime and size
+    """
+    SUFFIX = ".wfindex.npz"
+    VERSION = 1
+    MAX_RECORD_LENGTH = 2 ** 16
+    RECORD_DTYPE = np.dtype([
+        ("network", "U2"), ("station", "U5"), ("location", "U2"), ("channel", "U3"),
+        ("start", "f8"), ("end", "f8"), ("sampling_rate", "f8"), ("npts", "i8"),
+        ("offset", "i8"), ("length", "i8")
+    ])
+
+    def __init__(self, records):
+        self.records = records
+        self.channel_spans = None
+
+    @staticmethod
+    def load(file_path, data=None):
+        """
+        Cached index of the file, or a fresh scan of data (the memory-mapped file when not given) that is then cached
+        """
+        stat = os.stat(file_path)
+        key = np.array([MiniSeedIndex.VERSION, stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+        index = MiniSeedIndex.__read_cache(file_path, key)
+        if index is None:
+            if data is not None:
+                index = MiniSeedIndex(MiniSeedIndex.scan(data))
+            elif stat.st_size == 0:
+                index = MiniSeedIndex(np.empty(0, dtype=MiniSeedIndex.RECORD_DTYPE))
+            else:
+                with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    index = MiniSeedIndex(MiniSeedIndex.scan(data))
+            with contextlib.suppress(OSError):
+                with open(file_path + MiniSeedIndex.SUFFIX, 'wb') as file:
+                    np.savez(file, key=key, records=index.records)
+        return index
+
+    @staticmethod
+    def __read_cache(file_path, key):
+        with contextlib.suppress(OSError, ValueError, KeyError):
+            with np.load(file_path + MiniSeedIndex.SUFFIX) as cached:
+                if np.array_equal(cached["key"], key):
+                    return MiniSeedIndex(cached["records"])
+        return None
+
+    @staticmethod
+    def scan(data):
+        records = MiniSeedIndex.__scan_fixed_length(data)
+        if records is not None:
+            return records
+        records = []
+        offset = 0
+        while offset + 48 <= len(data):
+            record = MiniSeedIndex.__read_header(data, offset)
+            records.append(record)
+            offset += record[-1]
+        return np.array(records, dtype=MiniSeedIndex.RECORD_DTYPE)
+
+    @staticmethod
+    def __read_header(data, offset):
+        byte_order = '>' if 1900 <= struct.unpack_from('>H', data, offset + 20)[0] <= 2100 else '<'
+        (year, day, hour, minute, second, _, fraction, npts, rate_factor, rate_multiplier,
+         activity_flags, _, _, _, time_correction, _, blockette_offset) = \
+            struct.unpack_from(byte_order + 'HHBBBBHHhhBBBBiHH', data, offset + 20)
+        sampling_rate = MiniSeedIndex.__sampling_rate(rate_factor, rate_multiplier)
+        length = None
+        while blockette_offset and offset + blockette_offset + 4 <= len(data):
+            blockette_type, next_offset = struct.unpack_from(byte_order + 'HH', data, offset + blockette_offset)
+            if blockette_type == 100:
+                sampling_rate = struct.unpack_from(byte_order + 'f', data, offset + blockette_offset + 4)[0]
+            elif blockette_type == 1000:
+                length = 2 ** data[offset + blockette_offset + 6]
+            blockette_offset = next_offset
+        if length is None:
+            record = io.BytesIO(data[offset:offset + 2 * MiniSeedIndex.MAX_RECORD_LENGTH])
+            length = obspy.io.mseed.util.get_record_information(record)["record_length"]
+
+        start = calendar.timegm((year, 1, day, hour, minute, 0)) + second + fraction / 10000
+        if not activity_flags & 0x02:
+            start += time_correction / 10000
+        end = start + (npts - 1) / sampling_rate if sampling_rate and npts else start
+        station, location, channel, network = (data[offset + first:offset + last].decode('ascii', 'replace').strip()
+                                               for first, last in ((8, 13), (13, 15), (15, 18), (18, 20)))
+        return network, station, location, channel, start, end, sampling_rate, npts, offset, length
+
+    @staticmethod
+    def __scan_fixed_length(data):
+        """
+        All headers at once for the usual archive layout: records of the length of the first one, each with
+        one blockette 1000 at the same offset and the byte order of the first one. None for any other layout
+        """
+        if len(data) < 48:
+            return None
+        first = MiniSeedIndex.__read_header(data, 0)
+        length = first[-1]
+        if len(data) % length or length < 64:
+            return None
+        byte_order = '>' if 1900 <= struct.unpack_from('>H', data, 20)[0] <= 2100 else '<'
+        blockette_offset = struct.unpack_from(byte_order + 'H', data, 46)[0]
+        if not 48 <= blockette_offset <= length - 8:
+            return None
+        fields = [
+            ("station", "S5", 8), ("location", "S2", 13), ("channel", "S3", 15), ("network", "S2", 18),
+            ("year", "u2", 20), ("day", "u2", 22), ("hour", "u1", 24), ("minute", "u1", 25), ("second", "u1", 26),
+            ("fraction", "u2", 28), ("npts", "u2", 30), ("rate_factor", "i2", 32), ("rate_multiplier", "i2", 34),
+            ("activity_flags", "u1", 36), ("time_correction", "i4", 40), ("blockette_offset", "u2", 46),
+            ("blockette_type", "u2", blockette_offset), ("next_blockette", "u2", blockette_offset + 2),
+            ("length_exponent", "u1", blockette_offset + 6)
+        ]
+        header_dtype = np.dtype({"names": [name for name, _, _ in fields],
+                                 "formats": [byte_order + field_format for _, field_format, _ in fields],
+                                 "offsets": [offset for _, _, offset in fields], "itemsize": length})
+        headers = np.frombuffer(data, dtype=header_dtype)
+        if not (np.all(headers["blockette_offset"] == blockette_offset) and np.all(headers["blockette_type"] == 1000)
+                and np.all(headers["next_blockette"] == 0)
+                and np.all(headers["length_exponent"] == length.bit_length() - 1)
+                and np.all((headers["year"] >= 1900) & (headers["year"] <= 2100))):
+            return None
+
+        factor = headers["rate_factor"].astype(np.float64)
+        multiplier = headers["rate_multiplier"].astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sampling_rate = np.where(factor > 0, np.where(multiplier > 0, factor * multiplier, -factor / multiplier),
+                                     np.where(multiplier > 0, -multiplier / factor, 1 / (factor * multiplier)))
+        sampling_rate[(factor == 0) | (multiplier == 0)] = 0.0
+
+        days = ((headers["year"].astype(np.int64) - 1970).astype("datetime64[Y]").astype("datetime64[D]")
+                + (headers["day"].astype(np.int64) - 1))
+        start = (days.astype(np.int64) * 86400 + headers["hour"].astype(np.int64) * 3600
+                 + headers["minute"].astype(np.int64) * 60 + headers["second"]) + headers["fraction"] / 10000
+        start += np.where(headers["activity_flags"] & 0x02, 0, headers["time_correction"] / 10000)
+        npts = headers["npts"].astype(np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            end = np.where((sampling_rate > 0) & (npts > 0), start + (npts - 1) / sampling_rate, start)
+
+        records = np.empty(len(headers), dtype=MiniSeedIndex.RECORD_DTYPE)
+        for field in ("network", "station", "location", "channel"):
+            codes, inverse = np.unique(headers[field], return_inverse=True)
+            records[field] = np.array([code.decode('ascii', 'replace').strip() for code in codes.tolist()],
+                                      dtype=MiniSeedIndex.RECORD_DTYPE[field])[inverse]
+        records["start"], records["end"], records["sampling_rate"], records["npts"] = start, end, sampling_rate, npts
+        records["offset"] = np.arange(len(headers), dtype=np.int64) * length
+        records["length"] = length
+        return records
+
+    @staticmethod
+    def __sampling_rate(factor, multiplier):
+        if factor == 0 or multiplier == 0:
+            return 0.0
+        if factor > 0:
+            return factor * multiplier if multiplier > 0 else -factor / multiplier
+        return -multiplier / factor if multiplier > 0 else 1 / (factor * multiplier)
+
+    def channel_records(self, station, channel):
+        """
+        Records of one channel of a station, in time order
+        """
+        records = self.records[(self.records["station"] == station) & (self.records["channel"] == channel)]
+        return records[np.argsort(records["start"], kind="stable")]
+
+    def stream_ids(self):
+        """
+        (station, channel) pairs of the file in sorted order
+        """
+        if self.channel_spans is None:
+            self.channel_spans = self.__get_channel_spans()
+        return sorted(self.channel_spans)
+
+    def span(self, station, channels):
+        """
+        First sample time and last sample time over the given channels of a station
+        """
+        if self.channel_spans is None:
+            self.channel_spans = self.__get_channel_spans()
+        spans = [self.channel_spans[(station, channel)] for channel in channels]
+        return obspy.UTCDateTime(min(start for start, _ in spans)), obspy.UTCDateTime(max(end for _, end in spans))
+
+    def __get_channel_spans(self):
+        # sorting plain strings is much faster than sorting (station, channel) records
+        stations, station_codes = np.unique(self.records["station"], return_inverse=True)
+        channels, channel_codes = np.unique(self.records["channel"], return_inverse=True)
+        keys, inverse = np.unique(station_codes * len(channels) + channel_codes, return_inverse=True)
+        starts = np.full(len(keys), np.inf)
+        ends = np.full(len(keys), -np.inf)
+        np.minimum.at(starts, inverse, self.records["start"])
+        np.maximum.at(ends, inverse, self.records["end"])
+        return {(str(stations[key // len(channels)]), str(channels[key % len(channels)])): (start, end)
+                for key, start, end in zip(keys.tolist(), starts.tolist(), ends.tolist())}
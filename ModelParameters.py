@@ -0,0 +1,9 @@
+class ModelParameters:
+    """
+    Window geometry and backend names of NeuralNetworkModel, importable without tensorflow
+    """
+    WAVE_LENGTH = 400
+    NUMBER_OF_TRACES = 3
+    DELTA_X = 20
+    BATCH_SIZE = 32
+    BACKENDS = ("keras", "tflite-float32", "tflite-float16", "tflite-int8")
@@ -1,3 +1,7 @@
+import math
+import os
+import time
+
 import numpy as np
 import tensorflow as tf
 
@@ -5,7 +9,12 @@ from tensorflow import keras
 from keras import regularizers
 from kapre import STFT, Magnitude, MagnitudeToDecibel
 
+from ModelParameters import ModelParameters
+from PagedTraces import PagedTraces, PaddedTraces
 from Seismogram import Seismogram
+from PredictionCache import PredictionCache
+from PickIndex import PickIndex
+from TFLiteModel import TFLiteModel
 
 
 class MaxABSScaler(keras.layers.Layer):
@@ -23,42 +32,396 @@ class MaxABSScaler(keras.layers.Layer):
         return inputs / max_abs
 
 
-class NeuralNetworkModel:
-    WAVE_LENGTH = 400
-    NUMBER_OF_TRACES = 3
-    DELTA_X = 20
-    BATCH_SIZE = 32
+class InferenceCancelled(Exception):
+    pass
 
-    def __init__(self):
+
+class NeuralNetworkModel(ModelParameters):
+    N_FFT = 64
+    HOP_LENGTH = 16
+    WEIGHTS_PATH = "resources/mymodel_3_15.h5"
+    CALIBRATION_BATCHES = 100
+    COARSE_STRIDE_FACTOR = 10
+    MEMORY_LIMIT = 256 * 1024 ** 2
+
+    def __init__(self, shared_stft=False, prediction_cache: PredictionCache = None, backend="keras",
+                 calibration_seismograms: list[Seismogram] = None, adaptive_stride=False, adaptive_threshold=0.2,
+                 memory_limit=MEMORY_LIMIT, optimize_graph=False, jit_compile=False,
+                 batch_size=ModelParameters.BATCH_SIZE):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"unknown backend {backend}, expected one of {self.BACKENDS}")
         self.device_for_calculation = "/GPU:0" if (len(tf.config.list_physical_devices('GPU')) > 0) else "/device:CPU:0"
         print(self.device_for_calculation)
+        self.startup_timings = {}
+        start_time = time.perf_counter()
         self.model = self.__initialize_model()
+        self.startup_timings["graph"] = time.perf_counter() - start_time
+        start_time = time.perf_counter()
         self.__load_model_weights()
+        self.startup_timings["weights"] = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        self.shared_stft = shared_stft
+        self.batch_size = batch_size
+        self.memory_limit = memory_limit
+        self.spectrogram_model = self.__initialize_spectrogram_model()
+        self.backend = backend
+        self.optimize_graph = optimize_graph
+        self.jit_compile = jit_compile
+        self.inference_model = self.__initialize_backend(calibration_seismograms)
+        self.__predict_batch = self.__initialize_predict_function()
+        self.startup_timings["backend"] = time.perf_counter() - start_time
+        self.adaptive_stride = adaptive_stride
+        self.adaptive_threshold = adaptive_threshold
+        self.skipped_windows = 0
+        self.prediction_cache = prediction_cache
+        self.weights_hash = PredictionCache.file_hash(self.WEIGHTS_PATH) if prediction_cache else None
 
     def __load_model_weights(self):
-        self.model.load_weights("resources/mymodel_3_15.h5")
+        self.model.load_weights(self.WEIGHTS_PATH)
 
-    def get_prediction(self, seismogram: Seismogram, progress_bar):
+    def warm_up(self):
+        start_time = time.perf_counter()
+        keras_model = self.spectrogram_model if self.shared_stft else self.model
+        windows = np.zeros((self.batch_size,) + keras_model.input_shape[1:], dtype=np.float32)
+        self.inference_model.predict(WindowSequence([windows], self.batch_size), verbose=0)
+        self.predict_lean(WindowSequence([windows], self.batch_size))
+        self.startup_timings["warm_up"] = time.perf_counter() - start_time
 
-        traces_copy = np.array(
-            [
-                np.concatenate((np.zeros(200), seismogram.traces[0], np.zeros(200))),
-                np.concatenate((np.zeros(200), seismogram.traces[1], np.zeros(200))),
-                np.concatenate((np.zeros(200), seismogram.traces[2], np.zeros(200))),
-            ]
-        )
+    def get_prediction(self, seismogram: Seismogram, progress_bar):
+        return self.get_predictions([seismogram], progress_bar)[0]
+
+    def get_predictions(self, seismograms: list[Seismogram], progress_bar=None, callbacks=None):
+        results = [None] * len(seismograms)
+        # the keys and the inputs are both made from one snapshot per seismogram taken when the job starts
+        snapshots = [seismogram.snapshot() for seismogram in seismograms]
+        cache_keys = [self.__get_cache_key(seismogram.data_hash, filters)
+                      for seismogram, (filters, _) in zip(seismograms, snapshots)]
+        if self.prediction_cache:
+            results = [self.prediction_cache.get(key) for key in cache_keys]
+        missed_indexes = [i for i, result in enumerate(results) if result is None]
+
+        if missed_indexes:
+            predictions = self.__predict([snapshots[i][1] for i in missed_indexes], progress_bar, callbacks)
+            for i, result in zip(missed_indexes, predictions):
+                results[i] = result
+                if self.prediction_cache:
+                    self.prediction_cache.put(cache_keys[i], *result)
+
+        if self.prediction_cache:
+            print(self.prediction_cache.stats())
+        return results
+
+    def predict_windows(self, windows):
+        """
+        Probabilities for raw (windows, WAVE_LENGTH, NUMBER_OF_TRACES) windows through the active backend
+        """
+        inputs = np.asarray(windows, dtype=np.float32)
+        if self.shared_stft:
+            with tf.device(self.device_for_calculation):
+                stft = tf.signal.stft(np.transpose(inputs, (0, 2, 1)),
+                                      frame_length=self.N_FFT,
+                                      frame_step=self.HOP_LENGTH,
+                                      fft_length=self.N_FFT,
+                                      window_fn=tf.signal.hann_window,
+                                      pad_end=False)
+                inputs = np.transpose(tf.abs(stft).numpy(), (0, 2, 3, 1))
+        windows = WindowSequence([inputs], self.batch_size)
+        return windows.split(self.predict_lean(windows))[0]
+
+    def predict_lean(self, windows: "WindowSequence"):
+        """
+        Predicts the batches of windows without the keras predict machinery (data adapter, callbacks, retracing).
+        Like Model.predict, it returns the predictions of every window of every batch, padding included
+        """
+        if self.__predict_batch is None:
+            return self.inference_model.predict(windows, verbose=0)
+        outputs = [np.empty((0, 3), dtype=np.float32)]
+        for batch_index in range(len(windows)):
+            outputs.append(self.__predict_batch(windows[batch_index]).numpy())
+        return np.concatenate(outputs)
+
+    def __get_cache_key(self, data_hash, filters):
+        if not self.prediction_cache:
+            return None
+        return PredictionCache.make_key(data_hash, filters, self.weights_hash,
+                                        delta_x=self.DELTA_X, wave_length=self.WAVE_LENGTH, backend=self.backend,
+                                        batch_size=self.batch_size,
+                                        optimize_graph=self.optimize_graph and self.backend == "keras",
+                                        jit_compile=self.jit_compile and self.backend == "keras",
+                                        adaptive_stride=(self.COARSE_STRIDE_FACTOR, self.adaptive_threshold)
+                                        if self.adaptive_stride else None)
+
+    def get_inputs(self, seismogram: Seismogram):
+        return self.__get_inputs(seismogram.traces)
+
+    def __get_inputs(self, traces):
+        if self.shared_stft:
+            return self.__get_spectrogram_tiles(traces)
+        return self.__get_windows(traces)
+
+    def __predict(self, traces_list, progress_bar, callbacks):
+        inputs = [self.__get_inputs(traces) for traces in traces_list]
+        if self.adaptive_stride:
+            predictions = self.__predict_adaptive(inputs, progress_bar, callbacks)
+        else:
+            predictions = self.__predict_inputs(inputs, progress_bar, callbacks)
+
+        results = []
+        for prediction in predictions:
+            p_der_indexes = self.__get_maximums(prediction[:, 0])
+            s_der_indexes = self.__get_maximums(prediction[:, 1])
+            results.append((prediction, p_der_indexes, s_der_indexes))
+        return results
+
+    def __predict_inputs(self, inputs, progress_bar, callbacks, progress_range=(0, 100)):
+        """
+        Predictions of every seismogram's inputs, reported as progress from progress_range[0] to progress_range[1]
+        percent, so that several passes share one progress bar
+        """
+        windows = WindowSequence(inputs, self.batch_size)
+        start_time = time.perf_counter()
+        if not callbacks and progress_bar is None:
+            predicted = self.predict_lean(windows)
+        else:
+            if callbacks is None:
+                callbacks = [CustomCallback(progress_bar, len(windows) * self.batch_size, self.batch_size)]
+            for callback in callbacks:
+                if hasattr(callback, "progress_range"):
+                    callback.progress_range = progress_range
+            predicted = self.inference_model.predict(windows, callbacks=callbacks, verbose=0)
+        windows.release()
+        elapsed_time = time.perf_counter() - start_time
+        print(f"{windows.size()} windows from {len(inputs)} seismograms: "
+              f"{windows.size() / max(elapsed_time, 1e-9):.1f} windows/sec")
+        return windows.split(predicted)
+
+    def __predict_adaptive(self, inputs, progress_bar, callbacks):
+        """
+        Scans with a stride of COARSE_STRIDE_FACTOR * DELTA_X, then runs the fine windows only around coarse windows
+        whose non-noise probability exceeds adaptive_threshold. The windows left out are linearly interpolated.
+        A refined span is predicted whole, its coarse windows included: they were scaled in other batches than
+        their neighbours, and mixing both would make every COARSE_STRIDE_FACTOR-th window jump
+        """
+        factor = self.COARSE_STRIDE_FACTOR
+        total_windows = sum(len(windows) for windows in inputs)
+        # the coarse pass takes the share of the progress it would take if every other window were refined
+        coarse_percentage = sum(-(-len(windows) // factor) for windows in inputs) / max(total_windows, 1) * 100
+        coarse_predictions = self.__predict_inputs(
+            [IndexedWindows(windows, np.arange(0, len(windows), factor)) for windows in inputs],
+            progress_bar, callbacks, (0, coarse_percentage))
+
+        refined_indexes = []
+        for windows, coarse_prediction in zip(inputs, coarse_predictions):
+            coarse_indexes = np.arange(0, len(windows), factor)
+            active_indexes = coarse_indexes[1 - coarse_prediction[:, 2] > self.adaptive_threshold]
+            bounds = np.zeros(len(windows) + 1, dtype=int)
+            # from the coarse window before an active one to the one after it, both ends included
+            np.add.at(bounds, np.maximum(active_indexes - factor, 0), 1)
+            np.add.at(bounds, np.minimum(active_indexes + factor + 1, len(windows)), -1)
+            is_refined = np.cumsum(bounds[:-1]) > 0
+            refined_indexes.append(np.nonzero(is_refined)[0])
+
+        fine_predictions = [np.empty((0, 3), dtype=np.float32)] * len(inputs)
+        if sum(len(indexes) for indexes in refined_indexes) > 0:
+            fine_predictions = self.__predict_inputs(
+                [IndexedWindows(windows, indexes) for windows, indexes in zip(inputs, refined_indexes)],
+                progress_bar, callbacks, (coarse_percentage, 100))
+        elif not callbacks and progress_bar is not None:
+            # nothing to refine, the coarse pass did all the work
+            progress_bar.setVisible(False)
+
+        predictions = []
+        computed_windows = 0
+        for windows, coarse_prediction, indexes, fine_prediction in zip(inputs, coarse_predictions,
+                                                                       refined_indexes, fine_predictions):
+            coarse_indexes = np.arange(0, len(windows), factor)
+            all_indexes = np.arange(len(windows))
+            prediction = np.stack([np.interp(all_indexes, coarse_indexes, coarse_prediction[:, column])
+                                   for column in range(coarse_prediction.shape[1])], axis=1).astype(np.float32)
+            prediction[coarse_indexes] = coarse_prediction
+            # written last, so the refined spans hold fine predictions only
+            prediction[indexes] = fine_prediction
+            predictions.append(prediction)
+            computed_windows += len(np.union1d(coarse_indexes, indexes))
+
+        self.skipped_windows = total_windows - computed_windows
+        print(f"adaptive stride: {self.skipped_windows} of {total_windows} windows skipped "
+              f"({self.skipped_windows / max(total_windows, 1) * 100:.1f}%)")
+        return predictions
+
+    def __get_padded_traces(self, traces):
+        if isinstance(traces, PagedTraces):
+            return traces.padded(self.WAVE_LENGTH // 2)
+        padded_traces = np.zeros((self.NUMBER_OF_TRACES, len(traces[0]) + self.WAVE_LENGTH), dtype=np.float32)
+        padded_traces[:, self.WAVE_LENGTH // 2:-(self.WAVE_LENGTH // 2)] = traces
+        return padded_traces
+
+    def __get_windows(self, traces):
+        traces_copy = self.__get_padded_traces(traces)
+        if isinstance(traces_copy, PaddedTraces):
+            # the samples are paged in, so the windows are sliced from one chunk of the trace at a time
+            windows_count = (traces_copy.shape[-1] - self.WAVE_LENGTH) // self.DELTA_X + 1
+            window_bytes = self.DELTA_X * self.NUMBER_OF_TRACES * np.dtype(np.float32).itemsize
+            return SpectrogramTiles(self.__compute_windows, traces_copy,
+                                    (windows_count, self.WAVE_LENGTH, self.NUMBER_OF_TRACES),
+                                    max(self.batch_size, self.memory_limit // window_bytes))
         converted_traces = self.__horizontal_2D_sliding_window(
             traces_copy,
             (self.NUMBER_OF_TRACES, self.WAVE_LENGTH),
             self.DELTA_X)
-        converted_traces = np.transpose(converted_traces, (0, 2, 1))
-        callbacks = CustomCallback(progress_bar, converted_traces.shape[0])
-
-        predicted = self.model.predict(converted_traces[:], batch_size=NeuralNetworkModel.BATCH_SIZE,
-                                       callbacks=[callbacks], verbose=0)
-        p_der_indexes = self.__get_maximums(predicted[:, 0])
-        s_der_indexes = self.__get_maximums(predicted[:, 1])
-        return predicted, p_der_indexes, s_der_indexes
+        return np.transpose(converted_traces, (0, 2, 1))
+
+    def __compute_windows(self, traces_copy, first_window, last_window):
+        segment = traces_copy[:, first_window * self.DELTA_X:(last_window - 1) * self.DELTA_X + self.WAVE_LENGTH]
+        return np.transpose(self.__horizontal_2D_sliding_window(segment, (self.NUMBER_OF_TRACES, self.WAVE_LENGTH),
+                                                                self.DELTA_X), (0, 2, 1))
+
+    def __get_spectrogram_tiles(self, traces):
+        """
+        Lazy per-window magnitude tiles of the padded trace, computed in chunks that fit into memory_limit
+        """
+        traces_copy = self.__get_padded_traces(traces)
+        windows_count = (traces_copy.shape[-1] - self.WAVE_LENGTH) // self.DELTA_X + 1
+        frame_step = math.gcd(self.DELTA_X, self.HOP_LENGTH)
+        frames_count = (self.WAVE_LENGTH - self.N_FFT) // self.HOP_LENGTH + 1
+        tile_shape = (frames_count, self.N_FFT // 2 + 1, self.NUMBER_OF_TRACES)
+        # complex64 STFT frames plus their float32 magnitude for every new window of a chunk
+        window_bytes = self.DELTA_X // frame_step * int(np.prod(tile_shape[1:])) * (8 + 4)
+        chunk_windows = max(self.batch_size, self.memory_limit // window_bytes)
+        return SpectrogramTiles(self.__compute_spectrogram_tiles, traces_copy, (windows_count,) + tile_shape,
+                                chunk_windows)
+
+    def __compute_spectrogram_tiles(self, traces_copy, first_window, last_window):
+        """
+        Magnitude STFT of the padded trace segment under windows [first_window, last_window) sliced into
+        the per-window tiles the STFT layer would produce. Frames are computed once with a hop of
+        gcd(DELTA_X, HOP_LENGTH), so that the frames of every window are a strided subset of them.
+        """
+        frame_step = math.gcd(self.DELTA_X, self.HOP_LENGTH)
+        segment = traces_copy[:, first_window * self.DELTA_X:(last_window - 1) * self.DELTA_X + self.WAVE_LENGTH]
+        with tf.device(self.device_for_calculation):
+            stft = tf.signal.stft(segment,
+                                  frame_length=self.N_FFT,
+                                  frame_step=frame_step,
+                                  fft_length=self.N_FFT,
+                                  window_fn=tf.signal.hann_window,
+                                  pad_end=False)
+            magnitude = np.ascontiguousarray(np.transpose(tf.abs(stft).numpy(), (1, 2, 0)))
+
+        frames_count = (self.WAVE_LENGTH - self.N_FFT) // self.HOP_LENGTH + 1
+        shape = (last_window - first_window, frames_count) + magnitude.shape[1:]
+        strides = (magnitude.strides[0] * (self.DELTA_X // frame_step),
+                   magnitude.strides[0] * (self.HOP_LENGTH // frame_step)) + magnitude.strides[1:]
+        return np.lib.stride_tricks.as_strided(magnitude, shape=shape, strides=strides, writeable=False)
+
+    def __initialize_spectrogram_model(self):
+        """
+        The network body from the dB conversion on, fed with precomputed magnitude tiles
+        """
+        decibel_layer = next(layer for layer in self.model.layers if isinstance(layer, MagnitudeToDecibel))
+        return tf.keras.models.Model(inputs=decibel_layer.input, outputs=self.model.output,
+                                     name='custom_Resnet34_body')
+
+    def __initialize_backend(self, calibration_seismograms):
+        keras_model = self.spectrogram_model if self.shared_stft else self.model
+        if self.backend == "keras":
+            if self.optimize_graph:
+                keras_model = self.__get_optimized_model(keras_model)
+            if self.jit_compile:
+                keras_model.compile(jit_compile=True)
+            return keras_model
+
+        quantization = self.backend.removeprefix("tflite-")
+        model_path = f"{os.path.splitext(self.WEIGHTS_PATH)[0]}{'_body' if self.shared_stft else ''}_{quantization}.tflite"
+        if not os.path.exists(model_path) or os.path.getmtime(model_path) < os.path.getmtime(self.WEIGHTS_PATH):
+            representative_dataset = None
+            if calibration_seismograms:
+                representative_dataset = self.__get_representative_dataset(calibration_seismograms)
+            TFLiteModel.convert(keras_model, model_path, quantization, representative_dataset)
+        return TFLiteModel(model_path)
+
+    def __initialize_predict_function(self):
+        """
+        tf.function over one full batch of the keras backend, traced once here for its fixed input signature.
+        TFLite interpreters are already invoked directly, so they have none
+        """
+        if self.backend != "keras":
+            return None
+        keras_model = self.inference_model
+        input_signature = [tf.TensorSpec((self.batch_size,) + keras_model.input_shape[1:], tf.float32)]
+
+        @tf.function(input_signature=input_signature, jit_compile=self.jit_compile or None)
+        def predict_batch(batch):
+            with tf.device(self.device_for_calculation):
+                return keras_model(batch, training=False)
+
+        predict_batch.get_concrete_function()
+        return predict_batch
+
+    def __get_optimized_model(self, keras_model):
+        """
+        Inference-only copy of keras_model: Dropout layers are removed and every BatchNormalization that is
+        the only consumer of a Conv2D is folded into the kernel and bias of that convolution
+        """
+        config = keras_model.get_config()
+        layers = {layer["name"]: layer for layer in config["layers"]}
+        consumers = {}
+        for layer in config["layers"]:
+            for node in layer["inbound_nodes"]:
+                for inbound in node:
+                    consumers.setdefault(inbound[0], []).append(layer["name"])
+
+        folded = {}
+        for layer in config["layers"]:
+            if layer["class_name"] != "BatchNormalization" or len(layer["inbound_nodes"]) != 1:
+                continue
+            conv_name = layer["inbound_nodes"][0][0][0]
+            if layers[conv_name]["class_name"] == "Conv2D" and consumers[conv_name] == [layer["name"]]:
+                folded[layer["name"]] = conv_name
+        removed = set(folded) | {name for name, layer in layers.items() if layer["class_name"] == "Dropout"}
+
+        def resolve(inbound):
+            while inbound[0] in removed:
+                inbound = layers[inbound[0]]["inbound_nodes"][0][0][:len(inbound)]
+            return inbound
+
+        config["layers"] = [layer for layer in config["layers"] if layer["name"] not in removed]
+        for layer in config["layers"]:
+            layer["inbound_nodes"] = [[resolve(inbound) for inbound in node] for node in layer["inbound_nodes"]]
+            if layer["name"] in folded.values():
+                layer["config"]["use_bias"] = True
+        config["output_layers"] = [resolve(output) for output in config["output_layers"]]
+        with tf.device(self.device_for_calculation):
+            optimized_model = keras.Model.from_config(config, custom_objects={
+                "MaxABSScaler": MaxABSScaler, "STFT": STFT, "Magnitude": Magnitude,
+                "MagnitudeToDecibel": MagnitudeToDecibel})
+
+        convolutions = {conv_name: bn_name for bn_name, conv_name in folded.items()}
+        for layer in keras_model.layers:
+            if layer.name in removed or not layer.weights:
+                continue
+            weights = layer.get_weights()
+            if layer.name in convolutions:
+                batch_normalization = keras_model.get_layer(convolutions[layer.name])
+                gamma, beta, mean, variance = batch_normalization.get_weights()
+                scale = gamma / np.sqrt(variance + batch_normalization.epsilon)
+                bias = weights[1] if layer.use_bias else np.zeros_like(mean)
+                weights = [weights[0] * scale, (bias - mean) * scale + beta]
+            optimized_model.get_layer(layer.name).set_weights(weights)
+        print(f"optimized graph: {len(folded)} BatchNormalization folded, "
+              f"{len(removed) - len(folded)} Dropout removed")
+        return optimized_model
+
+    def __get_representative_dataset(self, seismograms: list[Seismogram]):
+        windows = WindowSequence([self.get_inputs(seismogram) for seismogram in seismograms],
+                                 self.batch_size)
+        batch_indexes = np.unique(np.linspace(0, len(windows) - 1, self.CALIBRATION_BATCHES).astype(int))
+
+        def representative_dataset():
+            for batch_index in batch_indexes:
+                yield [windows[batch_index]]
+
+        return representative_dataset
 
     def __initialize_model(self):
         with tf.device(self.device_for_calculation):
@@ -66,10 +429,10 @@ class NeuralNetworkModel:
             input_size = (400, 3)
 
             input_layer = tf.keras.layers.Input(shape=input_size)
-            x = STFT(n_fft=64,
+            x = STFT(n_fft=self.N_FFT,
                      window_name=None,
                      pad_end=False,
-                     hop_length=16,
+                     hop_length=self.HOP_LENGTH,
                      input_data_format='channels_last',
                      output_data_format='channels_last')(input_layer)
             x = Magnitude()(x)
@@ -100,19 +463,7 @@ class NeuralNetworkModel:
             x = tf.keras.layers.Dropout(0.5)(x)
             x = tf.keras.layers.Dense(output_size, activation="softmax", kernel_initializer='he_normal')(x)
 
-            model = tf.keras.models.Model(inputs=input_layer, outputs=x, name='custom_Resnet34')
-
-            fLoss = keras.losses.SparseCategoricalCrossentropy()
-            fOptimizer = tf.keras.optimizers.Adam(learning_rate=0.0001)
-            fMetric = [keras.metrics.SparseCategoricalAccuracy()]
-
-            model.compile(
-                loss=fLoss,
-                optimizer=fOptimizer,
-                metrics=[fMetric]
-            )
-
-            return model
+            return tf.keras.models.Model(inputs=input_layer, outputs=x, name='custom_Resnet34')
 
     def __res_identity(self, x, filters):
         x_skip = x
@@ -157,9 +508,7 @@ class NeuralNetworkModel:
     #             if (array[i] - array[i - 1] > array[i + 1] - array[i])]
 
     def __get_maximums(self, array):
-        return [i
-                for i in range(1, len(array) - 1)
-                if (array[i] - array[i - 1] > 0 >= array[i + 1] - array[i])]
+        return PickIndex.get_maximums(array)
 
     def __horizontal_2D_sliding_window(self, array, sliding_window_size, dx=40):
         shape = array.shape[:-2] + ((array.shape[-1] - sliding_window_size[-1]) // dx + 1,) + sliding_window_size
@@ -167,21 +516,160 @@ class NeuralNetworkModel:
         return np.lib.stride_tricks.as_strided(array, shape=shape, strides=strides, writeable=False)
 
 
+class WindowSequence(keras.utils.Sequence):
+    """
+    Streams the sliding windows of several seismograms as full batches. Every seismogram starts on a batch
+    boundary and its last batch is padded with its own windows: MaxABSScaler scales by the maximum of the whole
+    batch, so a batch never mixes seismograms and their predictions do not depend on each other
+    """
+
+    def __init__(self, windows, batch_size):
+        super(WindowSequence, self).__init__()
+        self.windows = windows
+        self.batch_size = batch_size
+        self.offsets = np.cumsum([0] + [len(window) for window in windows])
+        self.batch_offsets = np.cumsum([0] + [-(-len(window) // batch_size) for window in windows])
+
+    def size(self):
+        return int(self.offsets[-1])
+
+    def release(self):
+        for windows in self.windows:
+            if hasattr(windows, "release"):
+                windows.release()
+
+    def split(self, predicted):
+        """
+        The predictions of every seismogram, out of the predictions of all the batches
+        """
+        return [predicted[first * self.batch_size:first * self.batch_size + len(windows)]
+                for first, windows in zip(self.batch_offsets[:-1], self.windows)]
+
+    def __len__(self):
+        return int(self.batch_offsets[-1])
+
+    def __getitem__(self, index):
+        i = np.searchsorted(self.batch_offsets, index, side='right') - 1
+        for windows in self.windows[:i]:
+            if hasattr(windows, "release"):
+                windows.release()
+        low = (index - self.batch_offsets[i]) * self.batch_size
+        high = min(low + self.batch_size, len(self.windows[i]))
+        batch = np.asarray(self.windows[i][low:high], dtype=np.float32)
+        if len(batch) < self.batch_size:
+            batch = batch[np.arange(self.batch_size) % len(batch)]
+        return batch
+
+
+class ProgressCallback(keras.callbacks.Callback):
+    """
+    Reports prediction progress in percent and aborts it with InferenceCancelled once is_cancelled() is true
+    """
+
+    def __init__(self, on_progress, is_cancelled):
+        keras.callbacks.Callback.__init__(self)
+        self.on_progress = on_progress
+        self.is_cancelled = is_cancelled
+        # the part of the progress bar one predict call covers, in percent
+        self.progress_range = (0, 100)
+        self.current_percentage = 0
+
+    def on_predict_begin(self, logs=None):
+        self.current_percentage = int(self.progress_range[0])
+        self.on_progress(self.current_percentage)
+
+    def on_predict_batch_end(self, batch, logs=None):
+        if self.is_cancelled():
+            raise InferenceCancelled()
+        steps = self.params.get("steps") or 1
+        first, last = self.progress_range
+        current_percentage = int(first + (batch + 1) / steps * (last - first))
+        if current_percentage != self.current_percentage:
+            self.current_percentage = current_percentage
+            self.on_progress(current_percentage)
+
+
+class IndexedWindows:
+    """
+    Lazy subset of a windows array, gathered slice by slice by WindowSequence
+    """
+
+    def __init__(self, windows, indexes):
+        self.windows = windows
+        self.indexes = indexes
+        self.shape = (len(indexes),) + windows.shape[1:]
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, item):
+        return self.windows[self.indexes[item]]
+
+    def release(self):
+        if hasattr(self.windows, "release"):
+            self.windows.release()
+
+
+class SpectrogramTiles:
+    """
+    Lazy per-window tiles of one trace: spectrogram tiles, or the raw windows of paged traces. Only the chunk of
+    chunk_windows windows around the last request is kept
+    """
+
+    def __init__(self, compute_tiles, traces, shape, chunk_windows):
+        self.compute_tiles = compute_tiles
+        self.traces = traces
+        self.shape = shape
+        self.chunk_windows = chunk_windows
+        self.chunk_start = 0
+        self.chunk = None
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            indexes = range(len(self))[item]
+            if indexes.step == 1:
+                return self.__get_tiles(indexes.start, max(indexes.start, indexes.stop))
+        else:
+            indexes = np.asarray(item)
+            if indexes.ndim == 0:
+                return self.__get_tiles(int(indexes), int(indexes) + 1)[0]
+        tiles = np.empty((len(indexes),) + self.shape[1:], dtype=np.float32)
+        for position, index in enumerate(indexes):
+            tiles[position] = self.__get_tiles(index, index + 1)[0]
+        return tiles
+
+    def release(self):
+        self.chunk = None
+
+    def __get_tiles(self, start, stop):
+        if self.chunk is None or start < self.chunk_start or stop > self.chunk_start + len(self.chunk):
+            self.chunk_start = start
+            self.chunk = self.compute_tiles(self.traces, start, min(len(self), start + max(self.chunk_windows,
+                                                                                           stop - start)))
+        return self.chunk[start - self.chunk_start:stop - self.chunk_start]
+
+
 class CustomCallback(keras.callbacks.Callback):
-    def __init__(self, progress_bar, overall_size):
+    def __init__(self, progress_bar, overall_size, batch_size=NeuralNetworkModel.BATCH_SIZE):
         keras.callbacks.Callback.__init__(self)
         self.progress_bar = progress_bar
-        temp_count = int(overall_size / NeuralNetworkModel.BATCH_SIZE)
+        temp_count = int(overall_size / batch_size)
         self.count_size = temp_count if temp_count > 0 else 1
+        self.progress_range = (0, 100)
 
     def on_predict_begin(self, logs=None):
         self.progress_bar.setVisible(True)
-        self.progress_bar.setValue(0)
+        self.progress_bar.setValue(int(self.progress_range[0]))
 
     def on_predict_end(self, logs=None):
-        self.progress_bar.setValue(100)
-        self.progress_bar.setVisible(False)
+        self.progress_bar.setValue(int(self.progress_range[1]))
+        if self.progress_range[1] >= 100:
+            self.progress_bar.setVisible(False)
 
     def on_predict_batch_end(self, batch, logs=None):
-        current_percentage = int(batch / self.count_size * 100)
+        first, last = self.progress_range
+        current_percentage = int(first + batch / self.count_size * (last - first))
         self.progress_bar.setValue(current_percentage)
@@ -0,0 +1,134 @@
+import collections
+
+import numpy as np
+
+from EnvelopePyramid import EnvelopePyramid
+from PagedTraces import PagedChannel
+
+
+class PagedEnvelopePyramid:
+    """
+    EnvelopePyramid of one channel of PagedTraces. Ranges of at most VIEW_PAGES pages are served by pyramids of
+    their pages, wider ones by the per-bin extremes of the pages decoded so far, so zooming out never decodes
+    the whole file. Pages not decoded yet are left as gaps (NaN points)
+    """
+    VIEW_PAGES = 4
+
+    def __init__(self, channel: PagedChannel):
+        self.traces = channel.traces
+        self.channel = channel.channel
+        self.page_samples = self.traces.PAGE_SAMPLES
+        self.length = len(channel)
+        self.page_pyramids = collections.OrderedDict()
+
+    def auto_range(self):
+        """
+        Samples [first, last) shown when the plot is auto-ranged: the first VIEW_PAGES pages
+        """
+        return 0, min(self.length, self.VIEW_PAGES * self.page_samples)
+
+    def bounds(self):
+        overviews = [overview for overview in map(self.traces.overview, range(self.traces.pages_count))
+                     if overview is not None]
+        if not overviews:
+            return None, None
+        return (float(min(np.min(overview[1][self.channel]) for overview in overviews)),
+                float(max(np.max(overview[3][self.channel]) for overview in overviews)))
+
+    def get_range(self, first, last):
+        first, last = max(int(first), 0), min(int(last), self.length)
+        if first >= last:
+            return None
+        pages = self.__pages(first, last)
+        if len(pages) <= self.VIEW_PAGES:
+            ranges = [self.__page_pyramid(page).get_range(low, high) for page, low, high in pages]
+        else:
+            ranges = []
+            for page, _, _ in pages:
+                extremes = self.__overview_extremes(page, first, last)
+                if extremes is not None and len(extremes[0]) > 0:
+                    ranges.append((np.min(extremes[1]), np.max(extremes[3])))
+        ranges = [y_range for y_range in ranges if y_range is not None]
+        if not ranges:
+            return None
+        return float(min(low for low, _ in ranges)), float(max(high for _, high in ranges))
+
+    def get_points(self, first, last, width):
+        first, last = max(int(first), 0), min(int(last), self.length)
+        if first >= last:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        pages = self.__pages(first, last)
+        if len(pages) <= self.VIEW_PAGES:
+            points = []
+            for page, low, high in pages:
+                indexes, values = self.__page_pyramid(page).get_points(low, high,
+                                                                        width * (high - low) / (last - first))
+                points.append((indexes + page * self.page_samples, values))
+            return np.concatenate([indexes for indexes, _ in points]), np.concatenate([values for _, values in points])
+        return self.__get_overview_points(pages, first, last, width)
+
+    def __pages(self, first, last):
+        """
+        (page, first, last) of the samples [first, last) in each page they span, in page coordinates
+        """
+        return [(page, max(first - page * self.page_samples, 0), min(last - page * self.page_samples,
+                                                                     self.page_samples))
+                for page in range(first // self.page_samples, -(-last // self.page_samples))]
+
+    def __page_pyramid(self, page):
+        values = self.traces.page(page)
+        cached = self.page_pyramids.get(page)
+        if cached is None or cached[0] is not values:
+            cached = (values, EnvelopePyramid(values[self.channel]))
+            self.page_pyramids[page] = cached
+        self.page_pyramids.move_to_end(page)
+        while len(self.page_pyramids) > self.VIEW_PAGES:
+            self.page_pyramids.popitem(last=False)
+        return cached[1]
+
+    def __overview_extremes(self, page, first, last):
+        overview = self.traces.overview(page)
+        if overview is None:
+            return None
+        minimum_positions, minimum_values, maximum_positions, maximum_values = (
+            array[self.channel] for array in overview)
+        in_range = (minimum_positions >= first) & (minimum_positions < last)
+        return (minimum_positions[in_range], minimum_values[in_range],
+                maximum_positions[in_range], maximum_values[in_range])
+
+    def __get_overview_points(self, pages, first, last, width):
+        """
+        Extremes of the overview bins of the decoded pages, merged to two bins per pixel, with a NaN point
+        before every page that follows a page not decoded yet
+        """
+        bins_per_point = max(int((last - first) / max(width, 1) / 2 / self.traces.OVERVIEW_BIN), 1)
+        indexes, values = [], []
+        previous_page = None
+        for page, _, _ in pages:
+            extremes = self.__overview_extremes(page, first, last)
+            if extremes is None or len(extremes[0]) == 0:
+                continue
+            if previous_page is not None and page != previous_page + 1:
+                indexes.append(np.array([page * self.page_samples]))
+                values.append(np.array([np.nan]))
+            previous_page = page
+            minimum_positions, minimum_values, maximum_positions, maximum_values = extremes
+            minimum_choice = self.__reduce_arg(minimum_values, bins_per_point, np.argmin)
+            maximum_choice = self.__reduce_arg(maximum_values, bins_per_point, np.argmax)
+            pair_indexes = np.stack([minimum_positions[minimum_choice], maximum_positions[maximum_choice]], axis=1)
+            pair_values = np.stack([minimum_values[minimum_choice], maximum_values[maximum_choice]], axis=1)
+            order = np.argsort(pair_indexes, axis=1)
+            indexes.append(np.take_along_axis(pair_indexes, order, axis=1).ravel())
+            values.append(np.take_along_axis(pair_values, order, axis=1).ravel())
+        if not indexes:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(indexes), np.concatenate(values)
+
+    @staticmethod
+    def __reduce_arg(values, group_size, arg_function):
+        """
+        Index of the extreme of every group_size consecutive values
+        """
+        padding = -len(values) % group_size
+        padded = np.concatenate((values, np.repeat(values[-1:], padding))).reshape(-1, group_size)
+        return np.minimum(np.arange(0, len(values), group_size) + arg_function(padded, axis=1), len(values) - 1)
@@ -0,0 +1,226 @@
+import collections
+import copy
+import io
+import tempfile
+import threading
+
+import numpy as np
+import obspy
+
+from PolyphaseResampler import PolyphaseResampler
+from StreamingFilter import StreamingFilter
+
+
+class PagedTraces:
+    """
+    N/E/Z traces of a seismogram too long to keep in memory, resampled to the sampling rate of a TimeAxis.
+    Every page of PAGE_SAMPLES samples is decoded from only the records of the file that cover it, or read from
+    the temporary file of filtered samples, and the last pages are kept in an LRU of at most cache_bytes.
+    Samples are float64 like the traces of other seismograms. Indexing works like on a (3, samples) array
+    """
+    PAGE_SAMPLES = 2 ** 19
+    CACHE_BYTES = 256 * 1024 ** 2
+    FILTERED_CACHE_BYTES = 64 * 1024 ** 2
+    OVERVIEW_BIN = 1024
+
+    def __init__(self, file_path, channel_records, time_axis, sampling_rate, cache_bytes=CACHE_BYTES):
+        self.file_path = file_path
+        self.sampling_rate = sampling_rate
+        self.resampler = None
+        if not np.isclose(sampling_rate * time_axis.interval, 1):
+            self.resampler = PolyphaseResampler(sampling_rate, 1 / time_axis.interval)
+        self.records = [(np.asarray(records["start"], dtype=np.float64), np.asarray(records["offset"], dtype=np.int64),
+                         np.asarray(records["length"], dtype=np.int32)) for records in channel_records]
+        self.time_axis = time_axis
+        self.shape = (len(self.records), len(time_axis))
+        self.max_pages = max(1, cache_bytes // (self.shape[0] * self.PAGE_SAMPLES * np.dtype(np.float64).itemsize))
+        self.samples = None
+        self.samples_file = None
+        self.pages = collections.OrderedDict()
+        self.overviews = {}
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["pages"] = collections.OrderedDict()
+        state["overviews"] = {}
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __iter__(self):
+        return (PagedChannel(self, channel) for channel in range(len(self)))
+
+    def __getitem__(self, item):
+        if not isinstance(item, tuple):
+            return PagedChannel(self, range(len(self))[item]) if isinstance(item, int) else self[item, :]
+        channels, samples = item
+        if isinstance(samples, slice):
+            samples = range(self.shape[1])[samples]
+            if samples.step == 1:
+                return self.get(samples.start, max(samples.start, samples.stop))[channels]
+        elif isinstance(samples, (int, np.integer)):
+            page_index, position = divmod(range(self.shape[1])[samples], self.PAGE_SAMPLES)
+            return self.page(page_index)[channels, position]
+        indexes = np.asarray(samples)
+        values = np.empty((len(self),) + indexes.shape, dtype=np.float64)
+        for page_index in np.unique(indexes // self.PAGE_SAMPLES):
+            in_page = indexes // self.PAGE_SAMPLES == page_index
+            values[:, in_page] = self.page(page_index)[:, indexes[in_page] - page_index * self.PAGE_SAMPLES]
+        return values[channels]
+
+    @property
+    def pages_count(self):
+        return -(-self.shape[1] // self.PAGE_SAMPLES)
+
+    @property
+    def nbytes(self):
+        """
+        Size of the temporary file of filtered samples, the decoded samples only take the page cache
+        """
+        return self.samples.nbytes if self.samples is not None else 0
+
+    def get(self, first, last):
+        """
+        Samples [first, last) of all channels, gathered from their pages
+        """
+        values = np.empty((len(self), last - first), dtype=np.float64)
+        for page_index in range(first // self.PAGE_SAMPLES, -(-last // self.PAGE_SAMPLES)):
+            page_first = page_index * self.PAGE_SAMPLES
+            low, high = max(first, page_first), min(last, page_first + self.PAGE_SAMPLES)
+            values[:, low - first:high - first] = self.page(page_index)[:, low - page_first:high - page_first]
+        return values
+
+    def page(self, page_index):
+        with self.lock:
+            page = self.pages.get(page_index)
+            if page is not None:
+                self.pages.move_to_end(page_index)
+                return page
+        page = self.__decode_page(page_index)
+        with self.lock:
+            self.pages[page_index] = page
+            self.overviews[page_index] = self.__get_overview(page_index, page)
+            while len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        return page
+
+    def overview(self, page_index):
+        """
+        Positions and values of the minimums and of the maximums of every OVERVIEW_BIN samples of the page,
+        (channels, bins) each, or None while the page has not been read
+        """
+        with self.lock:
+            return self.overviews.get(page_index)
+
+    def padded(self, padding):
+        return PaddedTraces(self, padding)
+
+    def filtered(self, sos, zero_phase=False):
+        """
+        New PagedTraces of these traces filtered as a whole: StreamingFilter runs over the pages in order,
+        carrying its state from one page to the next, into a temporary file the new pages are read from.
+        The samples are exactly those of filtering the whole traces at once
+        """
+        samples_file = tempfile.TemporaryFile(prefix="wavefinder-", suffix=".f64")
+        samples = np.memmap(samples_file, dtype=np.float64, mode="w+", shape=self.shape)
+        StreamingFilter(sos, zero_phase, self.PAGE_SAMPLES).filter(self, samples)
+        # a copy starts with empty pages and overviews and a lock of its own
+        filtered = copy.copy(self)
+        filtered.samples = samples
+        filtered.samples_file = samples_file
+        filtered.max_pages = max(1, self.FILTERED_CACHE_BYTES // (self.shape[0] * self.PAGE_SAMPLES * 8))
+        return filtered
+
+    def __decode_page(self, page_index):
+        first = page_index * self.PAGE_SAMPLES
+        last = min(first + self.PAGE_SAMPLES, self.shape[1])
+        if self.samples is not None:
+            return np.array(self.samples[:, first:last])
+        indexes = np.arange(first, last)
+        return np.array([self.__decode_channel(channel, indexes) for channel in range(len(self))])
+
+    def __decode_channel(self, channel, indexes):
+        starts, offsets, lengths = self.records[channel]
+        times = self.time_axis.timestamps(indexes)
+        # the resampling filter reaches past the page, and its input is aligned to down samples
+        margin = (self.resampler.margin + self.resampler.down) / self.sampling_rate if self.resampler else 0
+        first = max(np.searchsorted(starts, times[0] - margin, side='right') - 1, 0)
+        last = np.searchsorted(starts, times[-1] + margin, side='right') + 1
+        chunks = []
+        with open(self.file_path, 'rb') as file:
+            for offset, length in zip(offsets[first:last].tolist(), lengths[first:last].tolist()):
+                file.seek(offset)
+                chunks.append(file.read(length))
+        if not chunks:
+            return np.zeros(len(times))
+        stream = obspy.read(io.BytesIO(b"".join(chunks)), format="MSEED")
+        stream.sort(keys=["starttime"])
+        sample_times = np.concatenate([trace.stats.starttime.timestamp + np.arange(trace.stats.npts) * trace.stats.delta
+                                       for trace in stream])
+        samples = np.concatenate([trace.data.astype(np.float64) for trace in stream])
+        values = np.interp(times, sample_times, samples)
+        stream.merge()
+        trace = stream[0]
+        if self.resampler and len(stream) == 1 and not np.ma.isMaskedArray(trace.data):
+            # like a trace read whole, sample j of the resampled channel is its first sample + j * interval;
+            # the segment starts a multiple of down samples after that, so its output falls on the same samples
+            lag = round((trace.stats.starttime.timestamp - starts[0]) * self.sampling_rate)
+            skip = -lag % self.resampler.down
+            resampled = self.resampler.resample(trace.data[skip:])
+            positions = indexes - (lag + skip) * self.resampler.up // self.resampler.down
+            in_segment = (positions >= 0) & (positions < len(resampled))
+            values[in_segment] = resampled[positions[in_segment]]
+        return values
+
+    def __get_overview(self, page_index, page):
+        bins_count = -(-page.shape[1] // self.OVERVIEW_BIN)
+        padded = np.pad(page, ((0, 0), (0, bins_count * self.OVERVIEW_BIN - page.shape[1])), mode="edge")
+        bins = padded.reshape(len(self), bins_count, self.OVERVIEW_BIN)
+        bin_starts = page_index * self.PAGE_SAMPLES + np.arange(bins_count) * self.OVERVIEW_BIN
+        last_position = page_index * self.PAGE_SAMPLES + page.shape[1] - 1
+        minimum_positions = np.minimum(bin_starts + np.argmin(bins, axis=2), last_position)
+        maximum_positions = np.minimum(bin_starts + np.argmax(bins, axis=2), last_position)
+        return minimum_positions, np.min(bins, axis=2), maximum_positions, np.max(bins, axis=2)
+
+
+class PagedChannel:
+    """
+    One channel of PagedTraces, indexed like a one-dimensional array
+    """
+
+    def __init__(self, traces: PagedTraces, channel):
+        self.traces = traces
+        self.channel = channel
+
+    def __len__(self):
+        return self.traces.shape[1]
+
+    def __getitem__(self, item):
+        return self.traces[self.channel, item]
+
+
+class PaddedTraces:
+    """
+    PagedTraces with padding zero samples on both sides, sliced like the padded array NeuralNetworkModel feeds
+    """
+
+    def __init__(self, traces: PagedTraces, padding):
+        self.traces = traces
+        self.padding = padding
+        self.shape = (traces.shape[0], traces.shape[1] + 2 * padding)
+
+    def __getitem__(self, item):
+        channels, samples = item
+        first, last, _ = samples.indices(self.shape[1])
+        values = np.zeros((self.shape[0], max(last - first, 0)), dtype=np.float32)
+        low = min(max(first - self.padding, 0), self.traces.shape[1])
+        high = min(max(last - self.padding, low), self.traces.shape[1])
+        values[:, low + self.padding - first:high + self.padding - first] = self.traces.get(low, high)
+        return values[channels]
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+class PickIndex:
+    """
+    Candidate picks of one phase ordered by probability: a threshold query is a binary search for the candidates
+    above the probability threshold plus one vectorized noise check over them. It is plain NumPy although
+    resources/requirements.txt pins numba: the vectorized passes take milliseconds, less than numba would
+    spend compiling them on their first call in every process
+    """
+
+    def __init__(self, indexes, probabilities, noise_probabilities):
+        indexes = np.asarray(indexes, dtype=np.int64)
+        order = np.argsort(-probabilities[indexes], kind="stable")
+        self.indexes = indexes[order]
+        self.negative_probabilities = -probabilities[self.indexes]
+        self.noise_probabilities = noise_probabilities[self.indexes]
+        self.removed = np.zeros(len(self.indexes), dtype=bool)
+        self.index_order = np.argsort(self.indexes, kind="stable")
+
+    @staticmethod
+    def get_maximums(values):
+        """
+        Indexes i with values[i - 1] < values[i] >= values[i + 1]
+        """
+        values = np.asarray(values)
+        is_maximum = (values[1:-1] - values[:-2] > 0) & (values[2:] - values[1:-1] <= 0)
+        return np.nonzero(is_maximum)[0] + 1
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def query(self, threshold, noise_threshold):
+        """
+        Sorted indexes of the candidates with probability > threshold and noise probability < noise_threshold
+        """
+        count = np.searchsorted(self.negative_probabilities, -threshold, side='left')
+        is_picked = (self.noise_probabilities[:count] < noise_threshold) & ~self.removed[:count]
+        return np.sort(self.indexes[:count][is_picked])
+
+    def candidates(self):
+        """
+        Sorted indexes of all candidates that were not removed
+        """
+        return np.sort(self.indexes[~self.removed])
+
+    def remove(self, index):
+        position = np.searchsorted(self.indexes, index, sorter=self.index_order)
+        if position < len(self.indexes) and self.indexes[self.index_order[position]] == index:
+            self.removed[self.index_order[position]] = True
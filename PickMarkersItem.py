@@ -0,0 +1,114 @@
+import numpy as np
+import pyqtgraph
+from PyQt6 import QtCore
+from pyqtgraph import GraphicsObject
+
+
+class PickMarkersItem(GraphicsObject):
+    """
+    Every pick marker of one phase on one plot, drawn as a single path of vertical lines across the view.
+    Clicks and drags are hit-tested against the sorted positions instead of going to one item per marker
+    """
+    sigClicked = QtCore.pyqtSignal(object, int)
+    sigPositionChangeFinished = QtCore.pyqtSignal(object, int, float)
+    HIT_DISTANCE = 4
+
+    def __init__(self, parent=None, pen=(0, 0, 0), selected_pen=(255, 190, 11)):
+        GraphicsObject.__init__(self)
+        self.parent = parent
+        self.pen = pyqtgraph.mkPen(pen)
+        self.selected_pen = pyqtgraph.mkPen(selected_pen)
+        self.positions = np.empty(0)
+        self.selected_index = None
+        self.movable = False
+        self.drag_index = None
+        self.drag_position = None
+        self._bounds = None
+
+    def setPositions(self, positions, selected_index=None):
+        self.positions = positions
+        self.selected_index = selected_index
+        self.update()
+
+    def setPen(self, pen):
+        self.pen = pyqtgraph.mkPen(pen)
+        self.update()
+
+    def setMovable(self, state):
+        self.movable = state
+
+    def viewTransformChanged(self):
+        self._bounds = None
+        GraphicsObject.viewTransformChanged(self)
+
+    def boundingRect(self):
+        if self._bounds is None:
+            view_rect = self.viewRect()
+            self._bounds = QtCore.QRectF() if view_rect is None else QtCore.QRectF(view_rect)
+            self.prepareGeometryChange()
+        return self._bounds
+
+    def paint(self, painter, *args):
+        view_rect = self.viewRect()
+        if view_rect is None or len(self.positions) == 0:
+            return
+        first, last = np.searchsorted(self.positions, [view_rect.left(), view_rect.right()])
+        visible = self.positions[first:last]
+        pixel_width = self.pixelWidth()
+        if len(visible) > 1 and pixel_width:
+            # markers falling into the same pixel column are drawn once
+            columns = np.floor((visible - view_rect.left()) / pixel_width)
+            visible = visible[np.concatenate(([True], np.diff(columns) > 0))]
+        if len(visible) > 0:
+            painter.setPen(self.pen)
+            painter.drawPath(pyqtgraph.arrayToQPath(np.repeat(visible, 2),
+                                                    np.tile([view_rect.top(), view_rect.bottom()], len(visible)),
+                                                    connect='pairs'))
+        if self.selected_index is not None:
+            position = self.positions[self.selected_index] if self.drag_position is None else self.drag_position
+            painter.setPen(self.selected_pen)
+            painter.drawLine(QtCore.QPointF(position, view_rect.top()), QtCore.QPointF(position, view_rect.bottom()))
+
+    def nearestIndex(self, x):
+        """
+        Index of the marker within HIT_DISTANCE pixels of x, or None
+        """
+        if len(self.positions) == 0:
+            return None
+        position = np.searchsorted(self.positions, x)
+        candidates = [index for index in (position - 1, position) if 0 <= index < len(self.positions)]
+        index = min(candidates, key=lambda candidate: abs(self.positions[candidate] - x))
+        pixel_width = self.pixelWidth()
+        if abs(self.positions[index] - x) > self.HIT_DISTANCE * (pixel_width or 0):
+            return None
+        return int(index)
+
+    def mouseClickEvent(self, ev):
+        index = self.nearestIndex(ev.pos().x()) if ev.button() == QtCore.Qt.MouseButton.LeftButton else None
+        if index is None:
+            ev.ignore()
+            return
+        ev.accept()
+        self.sigClicked.emit(self, index)
+
+    def mouseDragEvent(self, ev):
+        if ev.button() != QtCore.Qt.MouseButton.LeftButton:
+            ev.ignore()
+            return
+        if ev.isStart():
+            index = self.nearestIndex(ev.buttonDownPos().x())
+            if not self.movable or index is None or index != self.selected_index:
+                ev.ignore()
+                return
+            self.drag_index = index
+        elif self.drag_index is None:
+            ev.ignore()
+            return
+        ev.accept()
+        self.drag_position = ev.pos().x()
+        self.update()
+        if ev.isFinish():
+            index, position = self.drag_index, self.drag_position
+            self.drag_index = None
+            self.drag_position = None
+            self.sigPositionChangeFinished.emit(self, index, position)
@@ -0,0 +1,42 @@
+import fractions
+import functools
+
+import numpy as np
+import scipy
+
+
+class PolyphaseResampler:
+    """
+    Rational up/down resampling along the last axis with scipy's polyphase filter, whose low-pass FIR
+    removes what would alias above the new Nyquist frequency. The filter of every up/down pair is designed once
+    """
+    MAX_DENOMINATOR = 1000
+
+    def __init__(self, sampling_rate, target_rate):
+        ratio = fractions.Fraction(target_rate / sampling_rate).limit_denominator(self.MAX_DENOMINATOR)
+        self.up, self.down = ratio.numerator, ratio.denominator
+        self.window = PolyphaseResampler.design_window(self.up, self.down)
+        # input samples at each end of the output that depend on the zero padding
+        self.margin = -(-(len(self.window) // 2) // self.up)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def design_window(up, down):
+        """
+        The FIR filter resample_poly designs by default for the ratio
+        """
+        max_rate = max(up, down)
+        window = scipy.signal.firwin(2 * 10 * max_rate + 1, 1 / max_rate, window=('kaiser', 5.0))
+        window.flags.writeable = False
+        return window
+
+    def output_length(self, input_length):
+        """
+        Samples of the new rate from the first to the last input sample, both included
+        """
+        return (input_length - 1) * self.up // self.down + 1 if input_length else 0
+
+    def resample(self, data):
+        data = np.asarray(data, dtype=np.float64)
+        resampled = scipy.signal.resample_poly(data, self.up, self.down, axis=-1, window=self.window)
+        return resampled[..., :self.output_length(data.shape[-1])]
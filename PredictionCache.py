@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Disk-backed LRU cache of NN predictions, one npz file per entry
+    """
+
+    def __init__(self, cache_dir="cache", max_size_bytes=1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(data_hash, filters, model_hash, **parameters):
+        description = json.dumps([data_hash, filters, model_hash, sorted(parameters.items())], default=str)
+        return hashlib.sha1(description.encode()).hexdigest()
+
+    @staticmethod
+    def file_hash(file_path):
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, key):
+        file_path = self.__file_path(key)
+        with self.lock:
+            try:
+                with np.load(file_path) as data:
+                    result = (data["prediction"], data["p_der_indexes"], data["s_der_indexes"])
+                os.utime(file_path)
+            except (OSError, KeyError, ValueError):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return result
+
+    def put(self, key, prediction, p_der_indexes, s_der_indexes):
+        file_path = self.__file_path(key)
+        temp_path = f"{file_path}.tmp"
+        with self.lock:
+            with open(temp_path, 'wb') as file:
+                np.savez(file,
+                         prediction=prediction,
+                         p_der_indexes=np.asarray(p_der_indexes, dtype=np.int64),
+                         s_der_indexes=np.asarray(s_der_indexes, dtype=np.int64))
+            os.replace(temp_path, file_path)
+            self.__evict()
+
+    def clear(self):
+        with self.lock:
+            for entry in self.__entries():
+                os.remove(entry.path)
+            self.hits = 0
+            self.misses = 0
+
+    def size(self):
+        return sum(entry.stat().st_size for entry in self.__entries())
+
+    def stats(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total > 0 else 0.0
+        return f"cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0f}%), " \
+               f"{self.size() / 1024 ** 2:.1f} MB in {self.cache_dir}"
+
+    def __file_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def __entries(self):
+        return [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".npz")]
+
+    def __evict(self):
+        entries = sorted(self.__entries(), key=lambda entry: entry.stat().st_mtime)
+        total_size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            total_size -= entry.stat().st_size
+            os.remove(entry.path)
@@ -1,35 +1,208 @@
+import functools
+import hashlib
+import io
+import os
+
 import numpy as np
 import obspy
 import scipy
 
+from MiniSeedIndex import MiniSeedIndex
+from PagedTraces import PagedTraces
+from PolyphaseResampler import PolyphaseResampler
+from StageCache import StageCache
+from StreamingFilter import StreamingFilter
+from TimeAxis import TimeAxis
+
 
 class Seismogram:
     NN_sampling_rate = 100
+    PAGED_FILE_SIZE = 128 * 1024 ** 2
+    # filtered traces of all the seismograms of the process
+    stage_cache = StageCache()
 
-    def __init__(self, traces, file_path):
+    def __init__(self, traces, file_path, index: MiniSeedIndex):
         self.station_name = traces[0].stats.station
         self.sampling_rate = traces[0].stats.sampling_rate
         self.network = traces[0].stats.network
         self.channels = [traces[0].stats.channel, traces[1].stats.channel, traces[2].stats.channel]
-        self.start_time, self.end_time = obspy.io.mseed.util.get_start_and_end_time(file_path)
+        self.start_time, self.end_time = index.span(self.station_name, self.channels)
 
         self.file_path = file_path
-        self.original_traces = traces.copy()
-        self.traces = self.__interpolate_traces()
+        self.base_traces = self.__resample_traces(traces)
+        self.time_axis = TimeAxis.from_bounds(self.start_time.timestamp, self.end_time.timestamp,
+                                              len(self.base_traces[0]))
+        self.data_hash = hashlib.sha1(np.ascontiguousarray(self.base_traces)).hexdigest()
+        self.applied_filters = []
+        self.disabled_filters = set()
+        self.evaluated = ((), self.base_traces)
+
+    @staticmethod
+    def read_file(file_path):
+        if os.path.getsize(file_path) >= Seismogram.PAGED_FILE_SIZE:
+            return Seismogram.open_paged(file_path)
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        index = MiniSeedIndex.load(file_path, data)
+        sts = Seismogram.sort_stations(obspy.read(io.BytesIO(data), format="MSEED"))
+        return [Seismogram(sts[i:i + 3], file_path, index) for i in range(0, len(sts), 3)]
 
-    def __interpolate_traces(self):
+    @staticmethod
+    def open_paged(file_path):
+        """
+        Seismograms of the file that only read its record index now and decode their samples page by page later
+        """
+        index = MiniSeedIndex.load(file_path)
+        stream_ids = index.stream_ids()
+        stream_ids[::3], stream_ids[1::3] = stream_ids[1::3], stream_ids[::3]
+        return [PagedSeismogram(file_path, index, stream_ids[i][0], [channel for _, channel in stream_ids[i:i + 3]])
+                for i in range(0, len(stream_ids), 3)]
+
+    @staticmethod
+    def sort_stations(st):
+        sorted_list = sorted(st, key=lambda x: (x.stats.station, x.stats.channel))
+        sorted_list[::3], sorted_list[1::3] = sorted_list[1::3], sorted_list[::3]
+        return sorted_list
+
+    def __resample_traces(self, traces):
+        """
+        The three traces at NN_sampling_rate, resampled in one call. Filters never modify the result in place,
+        so it stays the base every pipeline of filters starts from
+        """
+        data = np.array([trace.data for trace in traces])
         if self.sampling_rate == Seismogram.NN_sampling_rate:
-            return np.array(self.original_traces)
-        else:
-            return np.array(
-                [self.original_traces[0].copy().interpolate(sampling_rate=Seismogram.NN_sampling_rate),
-                 self.original_traces[1].copy().interpolate(sampling_rate=Seismogram.NN_sampling_rate),
-                 self.original_traces[2].copy().interpolate(sampling_rate=Seismogram.NN_sampling_rate)])
+            return data
+        return PolyphaseResampler(self.sampling_rate, Seismogram.NN_sampling_rate).resample(data)
+
+    @property
+    def filters(self):
+        """
+        The applied filters that are switched on, in the order they are applied
+        """
+        return [spec for i, spec in enumerate(self.applied_filters) if i not in self.disabled_filters]
+
+    @property
+    def traces(self):
+        return self.snapshot()[1]
+
+    def snapshot(self):
+        """
+        The enabled filters and the traces they produce, read together: a filter applied from another
+        thread meanwhile does not pair the traces with other filters
+        """
+        filters = tuple(self.filters)
+        evaluated_filters, traces = self.evaluated
+        if evaluated_filters != filters:
+            traces = self.evaluate(filters)
+            self.evaluated = (filters, traces)
+        return filters, traces
+
+    def evaluate(self, filters):
+        """
+        The base traces with the filters applied in turn, resumed from the longest prefix of the filters
+        found in stage_cache. Every stage computed on the way is cached
+        """
+        if not filters:
+            return self.base_traces
+        length, traces = self.stage_cache.longest_prefix(self.data_hash, filters)
+        if traces is None:
+            traces = self.base_traces
+        for length in range(length + 1, len(filters) + 1):
+            order, frequency, filter_type, zero_phase = filters[length - 1]
+            sos = Seismogram.design_filter(order, frequency, filter_type)
+            traces = Seismogram.filter_traces(sos, traces, zero_phase)
+            self.stage_cache.put(self.data_hash, filters[:length], traces)
+        return traces
 
     def reset_trace(self):
-        self.traces = self.__interpolate_traces()
+        self.applied_filters.clear()
+        self.disabled_filters.clear()
+
+    def apply_filter(self, order: int, frequency, filter_type: str, zero_phase=False):
+        """
+        Appends the filter to the pipeline, the traces are filtered when they are read next
+        """
+        frequency = Seismogram.__hashable_frequency(frequency)
+        self.applied_filters.append((int(order), frequency, filter_type, bool(zero_phase)))
 
-    def apply_filter(self, order: int, frequency, filter_type: str):
-        sos = scipy.signal.butter(order, frequency, filter_type, fs=Seismogram.NN_sampling_rate, output='sos')
-        self.traces = scipy.signal.sosfilt(sos, self.traces)
+    def undo_filter(self):
+        """
+        Removes the last applied filter, returns False if there is none
+        """
+        if not self.applied_filters:
+            return False
+        self.disabled_filters.discard(len(self.applied_filters) - 1)
+        self.applied_filters.pop()
+        return True
+
+    def set_filter_enabled(self, index, enabled):
+        """
+        Switches an applied filter off, or back on, keeping its place in the pipeline
+        """
+        index = range(len(self.applied_filters))[index]
+        if enabled:
+            self.disabled_filters.discard(index)
+        else:
+            self.disabled_filters.add(index)
+
+    @staticmethod
+    def filter_traces(sos, traces, zero_phase=False, output=None):
+        """
+        sosfilt, or the forward-backward sosfiltfilt without phase shift, run chunk by chunk: the result is
+        that of filtering the traces at once, without the copies of them sosfiltfilt makes. The traces may be
+        memory-mapped, and output a float64 memory map. PagedTraces are filtered into new PagedTraces backed
+        by a temporary file. sosfilt releases the GIL while filtering
+        """
+        if isinstance(traces, PagedTraces) and output is None:
+            return traces.filtered(sos, zero_phase)
+        return StreamingFilter(sos, zero_phase).filter(traces, output)
+
+    @staticmethod
+    def design_filter(order: int, frequency, filter_type: str, sampling_rate=NN_sampling_rate):
+        """
+        Butterworth second-order sections, designed once for every order, frequency, type and sampling rate.
+        The result is shared and must not be modified (sosfilt does not accept a read-only one)
+        """
+        frequency = Seismogram.__hashable_frequency(frequency)
+        return Seismogram.__design_butterworth(int(order), frequency, filter_type, float(sampling_rate))
+
+    @staticmethod
+    def __hashable_frequency(frequency):
+        return tuple(map(float, frequency)) if np.ndim(frequency) else float(frequency)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def __design_butterworth(order, frequency, filter_type, sampling_rate):
+        return scipy.signal.butter(order, frequency, filter_type, fs=sampling_rate, output='sos')
+
+
+class PagedSeismogram(Seismogram):
+    """
+    Seismogram whose traces are PagedTraces: samples are decoded from the records covering the requested range
+    only, so a file of any length opens in the time of its index and takes a bounded amount of memory.
+    Filtered stages are PagedTraces in temporary files, so their cache is bounded by disk space instead
+    """
+    stage_cache = StageCache(8 * 1024 ** 3, "paged filter stages")
+
+    def __init__(self, file_path, index: MiniSeedIndex, station, channels):
+        channel_records = [index.channel_records(station, channel) for channel in channels]
+        self.station_name = station
+        self.sampling_rate = float(channel_records[0]["sampling_rate"][0])
+        self.network = str(channel_records[0]["network"][0])
+        self.channels = list(channels)
+        self.start_time, self.end_time = index.span(self.station_name, self.channels)
+
+        self.file_path = file_path
+        samples_count = int((self.end_time - self.start_time) * Seismogram.NN_sampling_rate + 1e-6) + 1
+        self.time_axis = TimeAxis(self.start_time.timestamp, 1 / Seismogram.NN_sampling_rate, samples_count)
+        self.base_traces = PagedTraces(file_path, channel_records, self.time_axis, self.sampling_rate)
+        # hashing the samples would decode the whole file, the records and the file version identify them instead
+        stat = os.stat(file_path)
+        data_hash = hashlib.sha1(f"{stat.st_size} {stat.st_mtime_ns}".encode())
+        for records in channel_records:
+            data_hash.update(records.tobytes())
+        self.data_hash = data_hash.hexdigest()
+        self.applied_filters = []
+        self.disabled_filters = set()
+        self.evaluated = ((), self.base_traces)
 
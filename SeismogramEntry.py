@@ -0,0 +1,89 @@
+import datetime
+
+import numpy as np
+
+from ModelParameters import ModelParameters
+from PickIndex import PickIndex
+from Seismogram import Seismogram
+
+
+class SeismogramEntry:
+    """
+    One row of the seismogram list: the checkbox, NN picks, sliders and pick markers of a seismogram.
+    It outlives the TraceWidget showing it, so operations on all rows work without creating widgets
+    """
+    PHASE_COLUMNS = {"P": 0, "S": 1}
+
+    def __init__(self, seismogram: Seismogram):
+        self.seismogram = seismogram
+        self.checked = False
+        self.view_ranges = None
+
+        self.prediction = None
+        self.pick_indexes = {"P": None, "S": None}
+        self.filtered_indexes = {"P": [], "S": []}
+        self.positions = {"P": np.empty(0), "S": np.empty(0)}
+
+        self.sliders_enabled = False
+        self.slider_values = {}
+        self.reset_sliders()
+
+    def set_prediction(self, prediction, p_der_indexes, s_der_indexes):
+        self.prediction = prediction
+        self.pick_indexes["P"] = PickIndex(p_der_indexes, prediction[:, 0], prediction[:, 2])
+        self.pick_indexes["S"] = PickIndex(s_der_indexes, prediction[:, 1], prediction[:, 2])
+
+    def reset_prediction(self):
+        self.prediction = None
+        self.pick_indexes = {"P": None, "S": None}
+        for phase in self.PHASE_COLUMNS:
+            self.filtered_indexes[phase].clear()
+            self.positions[phase] = np.empty(0)
+
+    def enable_sliders(self):
+        self.sliders_enabled = True
+        for phase in self.PHASE_COLUMNS:
+            self.slider_values[phase][0] = 1
+            self.filter_picks(phase)
+
+    def reset_sliders(self):
+        self.sliders_enabled = False
+        self.slider_values = {"P": [0, 80], "S": [0, 80]}
+
+    def filter_picks(self, phase):
+        """
+        Replaces the markers of the phase with the picks passing its slider thresholds
+        """
+        threshold, noise_threshold = self.slider_values[phase]
+        filtered_indexes = self.filtered_indexes[phase]
+        filtered_indexes.clear()
+        filtered_indexes.extend(self.pick_indexes[phase].query(threshold / 100.0, noise_threshold / 100.0).tolist())
+        self.positions[phase] = self.positions_from_model(filtered_indexes)
+
+    def positions_from_model(self, indexes):
+        return self.seismogram.time_axis.timestamps(ModelParameters.DELTA_X * np.asarray(indexes, dtype=np.int64))
+
+    def graphic_index_from_position(self, x_position):
+        return self.seismogram.time_axis.index(x_position)
+
+    def get_raw(self):
+        result = []
+        for phase, column in self.PHASE_COLUMNS.items():
+            result.append(phase)
+            result.extend(
+                [f"{int(ModelParameters.DELTA_X * index)} {self.prediction[index, column]} {self.prediction[index, 2]}"
+                 for index in self.pick_indexes[phase].candidates()])
+        return result
+
+    def get_lines_as_pks(self):
+        log_file = []
+        for phase in self.PHASE_COLUMNS:
+            for pos in self.positions[phase]:
+                for i, channel in enumerate(self.seismogram.channels):
+                    string = f"#T{self.seismogram.station_name} " \
+                             f"{channel} {self.seismogram.network} " \
+                             f"{phase} ? e " \
+                             f"{datetime.datetime.utcfromtimestamp(pos).strftime('%Y%m%d%H%M%S%f')} " \
+                             f"{self.seismogram.traces[i][self.graphic_index_from_position(pos)]}"
+                    log_file.append(string)
+        return log_file
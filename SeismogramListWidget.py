@@ -0,0 +1,102 @@
+from PyQt6 import QtCore, QtWidgets
+from PyQt6.QtWidgets import QListWidgetItem
+
+from SeismogramEntry import SeismogramEntry
+from TraceWidget import TraceWidget
+
+
+class SeismogramListWidget(QtWidgets.QListWidget):
+    """
+    List of seismograms that keeps a SeismogramEntry per row and creates TraceWidgets only for the visible rows.
+    Widgets of rows scrolled out of view are released to a pool and bound to the rows scrolled into view
+    """
+    SPARE_ROWS = 1
+    SPARE_WIDGETS = 2
+    ENTRY_ROLE = QtCore.Qt.ItemDataRole.UserRole
+
+    def __init__(self, parent=None):
+        QtWidgets.QListWidget.__init__(self, parent)
+        self.row_size = None
+        self.bound_widgets: dict[SeismogramEntry, TraceWidget] = {}
+        self.free_widgets: list[TraceWidget] = []
+
+    def addEntries(self, entries):
+        for entry in entries:
+            if self.row_size is None:
+                widget = self.__take_widget(entry)
+                self.row_size = widget.size()
+                self.free_widgets.append(widget)
+            item = QListWidgetItem(self)
+            item.setData(self.ENTRY_ROLE, entry)
+            item.setSizeHint(self.row_size)
+        self.updateWidgets()
+
+    def entries(self) -> list[SeismogramEntry]:
+        return [self.item(row).data(self.ENTRY_ROLE) for row in range(self.count())]
+
+    def entryFromItem(self, item):
+        return item.data(self.ENTRY_ROLE)
+
+    def traceWidget(self, entry):
+        """
+        The widget showing the entry, or None while its row is out of view
+        """
+        return self.bound_widgets.get(entry)
+
+    def refreshCheckboxes(self):
+        for widget in self.bound_widgets.values():
+            widget.refresh_checkbox()
+
+    def updateWidgets(self):
+        """
+        Binds widgets to the visible rows and releases the widgets of the others
+        """
+        visible_items = self.__visible_items()
+        visible_entries = {item.data(self.ENTRY_ROLE) for item in visible_items}
+        for entry in [entry for entry in self.bound_widgets if entry not in visible_entries]:
+            widget = self.bound_widgets.pop(entry)
+            widget.release()
+            widget.hide()
+            self.free_widgets.append(widget)
+
+        for item in visible_items:
+            entry = item.data(self.ENTRY_ROLE)
+            widget = self.bound_widgets.get(entry)
+            if widget is None:
+                widget = self.bound_widgets[entry] = self.__take_widget(entry)
+            widget.setGeometry(self.visualItemRect(item))
+            widget.show()
+
+        while len(self.free_widgets) > self.SPARE_WIDGETS:
+            self.free_widgets.pop().deleteLater()
+
+    def updateGeometries(self):
+        QtWidgets.QListWidget.updateGeometries(self)
+        self.updateWidgets()
+
+    def scrollContentsBy(self, dx, dy):
+        QtWidgets.QListWidget.scrollContentsBy(self, dx, dy)
+        self.updateWidgets()
+
+    def __take_widget(self, entry):
+        if self.free_widgets:
+            widget = self.free_widgets.pop()
+            widget.bind(entry)
+        else:
+            widget = TraceWidget(entry, self.viewport())
+        return widget
+
+    def __visible_items(self):
+        if self.count() == 0:
+            return []
+        viewport_rect = self.viewport().rect()
+        first_index = self.indexAt(viewport_rect.topLeft())
+        if not first_index.isValid():
+            # the rows are not laid out yet, updateGeometries comes again once they are
+            return []
+        last_index = self.indexAt(viewport_rect.bottomLeft())
+        first_row = first_index.row()
+        last_row = last_index.row() if last_index.isValid() else self.count() - 1
+        first_row = max(first_row - self.SPARE_ROWS, 0)
+        last_row = min(last_row + self.SPARE_ROWS, self.count() - 1)
+        return [self.item(row) for row in range(first_row, last_row + 1)]
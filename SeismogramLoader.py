@@ -0,0 +1,66 @@
+import itertools
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from Seismogram import Seismogram
+
+
+class SeismogramLoader(QThread):
+    """
+    Reads MiniSEED files into Seismograms in a pool of processes, one file per task, off the GUI thread.
+    The seismograms of a file are sent back as soon as it is read, and a bad file is reported without
+    stopping the others
+    """
+    file_loaded = pyqtSignal(int, str, object)
+    file_failed = pyqtSignal(int, str, str)
+    progress_changed = pyqtSignal(int, int, int)
+    job_finished = pyqtSignal(int)
+
+    def __init__(self, max_workers=None, parent=None):
+        QThread.__init__(self, parent)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.jobs = queue.Queue()
+        self.job_ids = itertools.count(1)
+        self.executor = None
+
+    def submit(self, file_paths):
+        job_id = next(self.job_ids)
+        self.jobs.put((job_id, list(file_paths)))
+        return job_id
+
+    def stop(self):
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            self.__run_job(*job)
+        if self.executor:
+            self.executor.shutdown(cancel_futures=True)
+
+    def __run_job(self, job_id, file_paths):
+        if self.executor is None:
+            # spawned workers do not inherit the Qt and tensorflow threads of this process
+            self.executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        futures = {self.executor.submit(Seismogram.read_file, file_path): file_path for file_path in file_paths}
+        for files_done, future in enumerate(as_completed(futures), 1):
+            file_path = futures[future]
+            try:
+                self.file_loaded.emit(job_id, file_path, future.result())
+            except BrokenProcessPool as error:
+                self.file_failed.emit(job_id, file_path, str(error))
+                if self.executor:
+                    self.executor.shutdown(wait=False)
+                    self.executor = None
+            except Exception as error:
+                self.file_failed.emit(job_id, file_path, str(error))
+            self.progress_changed.emit(job_id, files_done, len(file_paths))
+        self.job_finished.emit(job_id)
@@ -0,0 +1,60 @@
+import collections
+import threading
+
+
+class StageCache:
+    """
+    LRU cache of the traces a Seismogram's filters produce, one entry for every prefix of its filters,
+    keyed by (data hash, filters). The least recently used stages are dropped once their nbytes add up to
+    more than max_size_bytes
+    """
+
+    def __init__(self, max_size_bytes=1024 ** 3, description="filter stages"):
+        self.max_size_bytes = max_size_bytes
+        self.description = description
+        self.stages = collections.OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def longest_prefix(self, data_hash, filters):
+        """
+        Number of leading filters whose result is cached and that result, or (0, None)
+        """
+        with self.lock:
+            for length in range(len(filters), 0, -1):
+                traces = self.stages.get((data_hash, filters[:length]))
+                if traces is not None:
+                    self.stages.move_to_end((data_hash, filters[:length]))
+                    self.hits += 1
+                    return length, traces
+            self.misses += 1
+            return 0, None
+
+    def put(self, data_hash, filters, traces):
+        if traces.nbytes > self.max_size_bytes:
+            return
+        with self.lock:
+            previous = self.stages.pop((data_hash, filters), None)
+            if previous is not None:
+                self.size_bytes -= previous.nbytes
+            self.stages[(data_hash, filters)] = traces
+            self.size_bytes += traces.nbytes
+            while self.size_bytes > self.max_size_bytes:
+                _, evicted = self.stages.popitem(last=False)
+                self.size_bytes -= evicted.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.stages.clear()
+            self.size_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total > 0 else 0.0
+        return f"{self.description}: {self.hits} hits, {self.misses} misses ({hit_rate:.0f}%), " \
+               f"{len(self.stages)} stages in {self.size_bytes / 1024 ** 2:.1f} of " \
+               f"{self.max_size_bytes / 1024 ** 2:.0f} MB"
@@ -0,0 +1,136 @@
+import numpy as np
+
+from ModelParameters import ModelParameters
+from Seismogram import Seismogram
+
+
+class StreamingPick:
+    def __init__(self, phase, window_index, timestamp, probability, noise_probability):
+        self.phase = phase
+        self.window_index = window_index
+        self.sample_index = window_index * ModelParameters.DELTA_X
+        self.timestamp = timestamp
+        self.probability = probability
+        self.noise_probability = noise_probability
+
+    def __repr__(self):
+        return f"{self.phase} {self.sample_index} {self.timestamp:.2f} {self.probability:.3f} {self.noise_probability:.3f}"
+
+
+class StreamingDetector:
+    """
+    Incremental P/S picking on a live N/E/Z feed sampled at Seismogram.NN_sampling_rate.
+    The last samples are kept in a ring buffer and only the windows completed by new samples are run,
+    so the windows are the ones get_prediction cuts from the whole recording while memory stays constant.
+    Records are placed by their start times, so channels may arrive one record at a time. Gaps in a channel
+    are filled with zeros, and so is a channel that stalls for more than max_lag_seconds behind the others;
+    its samples arriving later over the filled span are dropped. filled_samples counts the zeros per channel
+    """
+    PADDING = ModelParameters.WAVE_LENGTH // 2
+    MAX_LAG_SECONDS = 60
+
+    def __init__(self, model: "NeuralNetworkModel", start_time=0.0, p_threshold=0.5, s_threshold=0.5,
+                 noise_threshold=0.8, max_lag_seconds=MAX_LAG_SECONDS):
+        self.model = model
+        self.start_time = start_time
+        self.thresholds = {"P": (0, p_threshold), "S": (1, s_threshold)}
+        self.noise_threshold = noise_threshold
+
+        self.chunk_size = model.batch_size * model.DELTA_X
+        self.capacity = model.WAVE_LENGTH + self.chunk_size
+        self.buffer = np.zeros((2 * self.capacity, model.NUMBER_OF_TRACES), dtype=np.float32)
+        self.pending = [np.empty(0, dtype=np.float32) for _ in range(model.NUMBER_OF_TRACES)]
+        self.max_lag = int(max_lag_seconds * Seismogram.NN_sampling_rate)
+        self.filled_samples = [0] * model.NUMBER_OF_TRACES
+        self.samples_count = self.PADDING
+        self.next_window = 0
+        self.history = np.empty((0, 3), dtype=np.float32)
+
+    def latency(self):
+        """
+        Seconds between a sample and the earliest moment a pick on it can be emitted
+        """
+        return (self.PADDING + self.model.DELTA_X) / Seismogram.NN_sampling_rate
+
+    def append(self, samples_by_channel, start_time=None):
+        """
+        Adds new samples (one array per channel, possibly of different lengths) and returns the new picks.
+        start_time is the timestamp of their first sample, like the stats.starttime of a record; without it
+        they follow the samples received before on their channel
+        """
+        for channel, samples in enumerate(samples_by_channel):
+            if samples is not None and len(samples) > 0:
+                self.__receive(channel, np.asarray(samples, np.float32), start_time)
+        required = max(len(samples) for samples in self.pending) - self.max_lag
+        for channel, samples in enumerate(self.pending):
+            if len(samples) < required:
+                self.__fill(channel, required - len(samples))
+
+        picks = []
+        ready = min(len(samples) for samples in self.pending)
+        for position in range(0, ready, self.chunk_size):
+            length = min(self.chunk_size, ready - position)
+            self.__write(np.stack([samples[position:position + length] for samples in self.pending], axis=1))
+            picks.extend(self.__process_windows())
+        self.pending = [samples[ready:].copy() for samples in self.pending]
+        return picks
+
+    def finish(self):
+        """
+        Pads the end of the feed like get_prediction does and returns the remaining picks.
+        The channels that end early are filled with zeros up to the longest one first
+        """
+        furthest = max(len(samples) for samples in self.pending)
+        for channel, samples in enumerate(self.pending):
+            if len(samples) < furthest:
+                self.__fill(channel, furthest - len(samples))
+        padding = np.zeros(self.PADDING, dtype=np.float32)
+        return self.append([padding] * self.model.NUMBER_OF_TRACES)
+
+    def __receive(self, channel, samples, start_time):
+        if start_time is not None:
+            # index of the first sample in the feed and of the next one the channel expects
+            position = round((start_time - self.start_time) * Seismogram.NN_sampling_rate)
+            expected = self.samples_count - self.PADDING + len(self.pending[channel])
+            if position > expected:
+                self.__fill(channel, position - expected)
+            samples = samples[max(expected - position, 0):]
+        self.pending[channel] = np.concatenate((self.pending[channel], samples))
+
+    def __fill(self, channel, count):
+        self.filled_samples[channel] += count
+        self.pending[channel] = np.concatenate((self.pending[channel], np.zeros(count, np.float32)))
+
+    def __write(self, block):
+        start = self.samples_count % self.capacity
+        first = min(len(block), self.capacity - start)
+        for offset in (0, self.capacity):
+            self.buffer[offset + start:offset + start + first] = block[:first]
+            self.buffer[offset:offset + len(block) - first] = block[first:]
+        self.samples_count += len(block)
+
+    def __process_windows(self):
+        windows_count = (self.samples_count - self.model.WAVE_LENGTH) // self.model.DELTA_X + 1 - self.next_window
+        if windows_count <= 0:
+            return []
+        starts = (self.next_window + np.arange(windows_count)) * self.model.DELTA_X % self.capacity
+        windows = np.stack([self.buffer[start:start + self.model.WAVE_LENGTH] for start in starts])
+        prediction = self.model.predict_windows(windows)
+        self.next_window += windows_count
+        return self.__extract_picks(prediction)
+
+    def __extract_picks(self, prediction):
+        combined = np.concatenate((self.history, prediction))
+        first_index = self.next_window - len(combined)
+        picks = []
+        for phase, (column, threshold) in self.thresholds.items():
+            values = combined[:, column]
+            is_maximum = (values[1:-1] - values[:-2] > 0) & (values[2:] - values[1:-1] <= 0)
+            is_picked = is_maximum & (values[1:-1] > threshold) & (combined[1:-1, 2] < self.noise_threshold)
+            for position in np.nonzero(is_picked)[0] + 1:
+                window_index = first_index + int(position)
+                timestamp = self.start_time + window_index * self.model.DELTA_X / Seismogram.NN_sampling_rate
+                picks.append(StreamingPick(phase, window_index, timestamp,
+                                           float(combined[position, column]), float(combined[position, 2])))
+        self.history = combined[-2:]
+        return sorted(picks, key=lambda pick: pick.window_index)
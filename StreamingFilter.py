@@ -0,0 +1,64 @@
+import numpy as np
+import scipy
+
+
+class StreamingFilter:
+    """
+    sosfilt, or sosfiltfilt with its default odd padding, over (channels, samples) traces read chunk_samples
+    at a time with the filter state carried from one chunk to the next. The source may be an array, a
+    memory map or PagedTraces. The result is identical to filtering the whole traces at once, but besides
+    the float64 output only one chunk is held in memory
+    """
+    CHUNK_SAMPLES = 2 ** 18
+
+    def __init__(self, sos, zero_phase=False, chunk_samples=CHUNK_SAMPLES):
+        self.sos = np.asarray(sos, dtype=np.float64)
+        self.zero_phase = zero_phase
+        self.chunk_samples = chunk_samples
+        # the padding sosfiltfilt uses by default, the section zeros of plain low- and high-pass designs shorten it
+        taps = 2 * len(self.sos) + 1 - min(np.sum(self.sos[:, 2] == 0), np.sum(self.sos[:, 5] == 0))
+        self.padding = 3 * int(taps)
+        # steady-state initial conditions of a unit step, shaped to broadcast over the channels
+        self.step_state = scipy.signal.sosfilt_zi(self.sos)[:, np.newaxis, :]
+
+    def filter(self, source, output=None):
+        """
+        The filtered source, written into output when it is given (a float64 array or memory map of its shape)
+        """
+        channels, samples = source.shape
+        if output is None:
+            output = np.empty((channels, samples), dtype=np.float64)
+        if self.zero_phase:
+            self.__filter_zero_phase(source, output)
+            return output
+        state = np.zeros((len(self.sos), channels, 2))
+        for first, last in self.__chunks(0, samples):
+            output[:, first:last], state = scipy.signal.sosfilt(self.sos, source[:, first:last], zi=state)
+        return output
+
+    def __chunks(self, first, last):
+        return ((start, min(start + self.chunk_samples, last)) for start in range(first, last, self.chunk_samples))
+
+    def __filter_zero_phase(self, source, output):
+        samples = source.shape[1]
+        if samples <= self.padding:
+            raise ValueError(f"The length of the input vector x must be greater than padlen, "
+                             f"which is {self.padding}.")
+        # odd extensions of both ends, computed like scipy's odd_ext
+        head = source[:, :self.padding + 1]
+        tail = source[:, samples - self.padding - 1:]
+        left = 2 * head[:, :1] - head[:, self.padding:0:-1]
+        right = 2 * tail[:, -1:] - tail[:, -2:-(self.padding + 2):-1]
+
+        # forward pass over the extended traces; only the part over the source and the right extension is needed
+        _, state = scipy.signal.sosfilt(self.sos, left, zi=self.step_state * left[:, :1])
+        for first, last in self.__chunks(0, samples):
+            output[:, first:last], state = scipy.signal.sosfilt(self.sos, source[:, first:last], zi=state)
+        right_forward, _ = scipy.signal.sosfilt(self.sos, right, zi=state)
+
+        # backward pass from the end of the right extension, in place from the last chunk to the first
+        _, state = scipy.signal.sosfilt(self.sos, right_forward[:, ::-1],
+                                        zi=self.step_state * right_forward[:, -1:])
+        for first, last in reversed(list(self.__chunks(0, samples))):
+            backward, state = scipy.signal.sosfilt(self.sos, output[:, first:last][:, ::-1], zi=state)
+            output[:, first:last] = backward[:, ::-1]
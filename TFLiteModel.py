@@ -0,0 +1,55 @@
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+
+class TFLiteModel:
+    """
+    Runs a converted TFLite model behind the part of the keras Model.predict interface NeuralNetworkModel uses
+    """
+    QUANTIZATIONS = ("float32", "float16", "int8")
+
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.input_index = self.interpreter.get_input_details()[0]["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        self.batch_size = None
+
+    @staticmethod
+    def convert(keras_model, model_path, quantization="float32", representative_dataset=None):
+        if quantization not in TFLiteModel.QUANTIZATIONS:
+            raise ValueError(f"unknown quantization {quantization}")
+        converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+        if quantization == "float16":
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            converter.target_spec.supported_types = [tf.float16]
+        elif quantization == "int8":
+            if representative_dataset is None:
+                raise ValueError("int8 quantization requires a calibration set")
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            converter.representative_dataset = representative_dataset
+        with open(model_path, 'wb') as file:
+            file.write(converter.convert())
+
+    def predict(self, sequence, callbacks=None, verbose=0):
+        callback_list = keras.callbacks.CallbackList(callbacks, add_progbar=False,
+                                                     verbose=verbose, epochs=1, steps=len(sequence))
+        callback_list.on_predict_begin()
+        outputs = []
+        for batch_index in range(len(sequence)):
+            callback_list.on_predict_batch_begin(batch_index)
+            outputs.append(self.__invoke(sequence[batch_index]))
+            callback_list.on_predict_batch_end(batch_index)
+        callback_list.on_predict_end()
+        return np.concatenate(outputs)
+
+    def __invoke(self, batch):
+        if batch.shape[0] != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_size = batch.shape[0]
+        self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index).copy()
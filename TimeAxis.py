@@ -0,0 +1,41 @@
+import numpy as np
+
+
+class TimeAxis:
+    """
+    Timestamps of evenly spaced samples, start + index * interval; arrays are only built for the indexes asked for
+    """
+
+    def __init__(self, start, interval, length):
+        self.start = float(start)
+        self.interval = float(interval)
+        self.length = int(length)
+
+    @staticmethod
+    def from_bounds(start, end, length):
+        return TimeAxis(start, (end - start) / (length - 1), length)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def end(self):
+        return self.start + (self.length - 1) * self.interval
+
+    def timestamps(self, indexes):
+        return self.start + np.asarray(indexes, dtype=np.int64) * self.interval
+
+    def index(self, timestamp):
+        """
+        Index of the sample nearest to the timestamp, clipped to the axis
+        """
+        index = int(np.rint((timestamp - self.start) / self.interval))
+        return min(max(index, 0), self.length - 1)
+
+    def index_range(self, left, right):
+        """
+        Samples [first, last) drawn between the timestamps, with one more sample on each side
+        """
+        first = int(np.floor((left - self.start) / self.interval))
+        last = int(np.ceil((right - self.start) / self.interval)) + 1
+        return min(max(first, 0), self.length), min(max(last, 0), self.length)
@@ -1,4 +1,7 @@
+import numpy as np
+
 from CustomInfiniteLine import CustomInfiniteLine
+from PickMarkersItem import PickMarkersItem
 
 
 class VerticalTriadeLine:
@@ -39,17 +42,102 @@ class VerticalTriadeLine:
         return self.lines[0].movable
 
 
-class PVerticalTriadeLine(VerticalTriadeLine):
-    def __init__(self, pos=0):
-        super().__init__(pos=pos)
-        self.base_pen = (255, 0, 0)
+class TriadePickMarkers:
+    """
+    Pick markers of one phase on the N/E/Z plots: one PickMarkersItem per plot over a shared sorted positions array
+    """
+
+    def __init__(self):
+        self.base_pen = (0, 0, 0)
+        self.hover_pen = (255, 190, 11)
+        self.positions = np.empty(0)
+        self.selected_index = None
+        self.lines = [PickMarkersItem(parent=self, pen=self.base_pen, selected_pen=self.hover_pen) for _ in range(3)]
         for line in self.lines:
-            line.setPen(self.base_pen)
+            line.sigClicked.connect(self.__select)
+            line.sigPositionChangeFinished.connect(self.__move)
 
+    def connectClick(self, method):
+        for line in self.lines:
+            line.sigClicked.connect(method)
 
-class SVerticalTriadeLine(VerticalTriadeLine):
-    def __init__(self, pos=0):
-        super().__init__(pos=pos)
-        self.base_pen = (0, 255, 0)
+    def connectPositionFinished(self, method):
+        for line in self.lines:
+            line.sigPositionChangeFinished.connect(method)
+
+    def setPositions(self, positions):
+        """
+        Replaces the markers; the items are only redrawn when the positions changed, and the selection is kept
+        if its marker is still there
+        """
+        positions = np.sort(np.asarray(positions, dtype=float))
+        if np.array_equal(positions, self.positions):
+            return
+        selected_pos = self.pos()
+        self.positions = positions
+        self.selected_index = None
+        if selected_pos is not None:
+            index = np.searchsorted(positions, selected_pos)
+            if index < len(positions) and positions[index] == selected_pos:
+                self.selected_index = int(index)
+        self.__update()
+
+    def addPos(self, pos):
+        index = int(np.searchsorted(self.positions, pos))
+        self.positions = np.insert(self.positions, index, pos)
+        if self.selected_index is not None and self.selected_index >= index:
+            self.selected_index += 1
+        self.__update()
+
+    def removeSelected(self):
+        if self.selected_index is not None:
+            self.positions = np.delete(self.positions, self.selected_index)
+            self.selected_index = None
+            self.__update()
+
+    def clearSelection(self):
+        if self.selected_index is not None:
+            self.selected_index = None
+            self.__update()
+
+    def setMovables(self, state):
         for line in self.lines:
-            line.setPen(self.base_pen)
+            line.setMovable(state)
+
+    def setPen(self, pen):
+        for line in self.lines:
+            line.setPen(pen)
+
+    def pos(self):
+        return None if self.selected_index is None else float(self.positions[self.selected_index])
+
+    def movable(self):
+        return self.lines[0].movable
+
+    def __select(self, line, index):
+        self.selected_index = index
+        self.__update()
+
+    def __move(self, line, index, pos):
+        positions = np.delete(self.positions, index)
+        self.selected_index = int(np.searchsorted(positions, pos))
+        self.positions = np.insert(positions, self.selected_index, pos)
+        self.__update()
+
+    def __update(self):
+        for line in self.lines:
+            line.setPositions(self.positions, self.selected_index)
+
+
+class PTriadePickMarkers(TriadePickMarkers):
+    def __init__(self):
+        super().__init__()
+        self.base_pen = (255, 0, 0)
+        self.setPen(self.base_pen)
+
+
+class STriadePickMarkers(TriadePickMarkers):
+    def __init__(self):
+        super().__init__()
+        self.base_pen = (0, 255, 0)
+        self.setPen(self.base_pen)
@@ -2,6 +2,8 @@ import datetime
 import pyqtgraph
 from pyqtgraph import DateAxisItem
 
+from EnvelopeCurveItem import EnvelopeCurveItem
+
 
 class TriadePlots:
     def __init__(self, plots):
@@ -15,16 +17,16 @@ class TriadePlots:
         local_now = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=0)))
         return (local_now - now).total_seconds() / 3600
 
-    def plot(self, x, ys):
-        self.plotItems = []
-        self.plotItems.extend(plot.plot(x, y, pen=self.base_pen) for plot, y in zip(self.plots, ys))
+    def plot(self):
+        self.plotItems = [EnvelopeCurveItem(pen=self.base_pen) for _ in self.plots]
+        for plot, plotItem in zip(self.plots, self.plotItems):
+            plot.addItem(plotItem)
         for plot in self.plots:
             plot.plotItem.setAxisItems({'bottom': DateAxisItem(utcOffset=self.get_utc_local_diff_hours())})
             plot.setBackground('w')
             plot.getAxis('bottom').setTextPen('k')
             plot.getAxis('left').setTextPen('k')
             plot.plotItem.getAxis('left').setWidth(50)
-            plot.setLimits(xMin=x[0], xMax=x[len(x) - 1])
 
     def addItems(self, items):
         for plot, item in zip(self.plots, items):
@@ -35,9 +37,11 @@ class TriadePlots:
             pyqtgraph.SignalProxy(plot.scene().sigMouseMoved, rateLimit=60, slot=method)
             for plot in self.plots)
 
-    def setDatas(self, x, ys):
+    def setDatas(self, time_axis, ys):
         for plotItem, y in zip(self.plotItems, ys):
-            plotItem.setData(x, y)
+            plotItem.setTrace(time_axis, y)
+        for plot in self.plots:
+            plot.setLimits(xMin=time_axis.start, xMax=time_axis.end)
 
     def removeItems(self, items):
         for plot, item in zip(self.plots, items):
@@ -1,7 +1,12 @@
+import time
+
+STARTUP_TIME = time.perf_counter()
+
+import argparse
+import functools
 import os
 import sys
 
-import obspy
 import PyQt6
 from PyQt6 import QtWidgets
 from PyQt6.QtCore import pyqtSlot
@@ -9,7 +14,7 @@ from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtWidgets import QAbstractItemView
 from PyQt6.QtWidgets import QFileDialog
 from PyQt6.QtWidgets import QDialog
-from PyQt6.QtWidgets import QListWidgetItem
+from PyQt6.QtWidgets import QMenu
 from PIL import Image
 from PIL import ImageQt
 import pyqtgraph
@@ -17,16 +22,22 @@ import pyqtgraph.exporters
 
 from ChkBxFileDialog import ChkBxFileDialog
 from TraceWidget import TraceWidget
-from Seismogram import Seismogram
+from Seismogram import Seismogram, PagedSeismogram
+from SeismogramEntry import SeismogramEntry
+from SeismogramLoader import SeismogramLoader
 from FilterDialog import FilterDialog
+from FilterWorker import FilterWorker
 
 from resources.ui_MainWindow import Ui_MainForm
-from NeuralNetworkModel import NeuralNetworkModel
+from ModelParameters import ModelParameters
+from InferenceWorker import InferenceWorker
+from PredictionCache import PredictionCache
+from InferenceSettings import InferenceSettings
 
 
 class MainWindow(QtWidgets.QWidget):
 
-    def __init__(self, model, parent=None):
+    def __init__(self, model_factory, inference_settings: InferenceSettings = None, parent=None):
         QtWidgets.QWidget.__init__(self, parent)
 
         self.ui = Ui_MainForm()
@@ -36,7 +47,11 @@ class MainWindow(QtWidgets.QWidget):
         self.ui.apply_filter_btn.clicked.connect(self.apply_filter)
         self.ui.invert_selection_btn.clicked.connect(self.invert_selection)
         self.ui.reset_filters_btn.clicked.connect(self.reset_seismograms)
+        self.ui.undo_filter_btn.clicked.connect(self.undo_filter)
+        self.ui.filters_btn.setMenu(QMenu(self.ui.filters_btn))
+        self.ui.filters_btn.menu().aboutToShow.connect(self._on_filters_menu_shown)
         self.ui.apply_NN_btn.clicked.connect(self.apply_NN)
+        self.ui.cancel_NN_btn.clicked.connect(self.cancel_NN)
         self.ui.for_all_chkbox.clicked.connect(self.select_all)
         self.ui.save_results_btn.clicked.connect(self.save_seismograms)
 
@@ -44,7 +59,10 @@ class MainWindow(QtWidgets.QWidget):
         self.ui.seismogram_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.ui.seismogram_list.setAutoScroll(False)
 
-        self.ui.progress_bar.setVisible(False)
+        self.ui.progress_bar.setRange(0, 0)
+        self.ui.progress_bar.setFormat("Загрузка НС")
+        self.ui.load_progress_bar.setVisible(False)
+        self.ui.filter_progress_bar.setVisible(False)
 
         self.file_formats = {
             "PNG (*.png)": self.save_as_png,
@@ -52,42 +70,156 @@ class MainWindow(QtWidgets.QWidget):
             "RAW (*.raw)": self.save_raw
         }
 
-        self.trace_widgets_list: list[TraceWidget] = []
-        self.model = model
+        self.model = None
+        self.inference_settings = inference_settings
+
+        self.inference_jobs: dict[int, list[SeismogramEntry]] = {}
+        self.inference_worker = InferenceWorker(model_factory, self)
+        self.inference_worker.model_loaded.connect(self._on_model_loaded)
+        self.inference_worker.model_failed.connect(self._on_model_failed)
+        self.inference_worker.job_started.connect(self._on_inference_started)
+        self.inference_worker.progress_changed.connect(self._on_inference_progress)
+        self.inference_worker.prediction_ready.connect(self._on_prediction_ready)
+        self.inference_worker.job_finished.connect(self._on_inference_finished)
+        self.inference_worker.job_failed.connect(self._on_inference_failed)
+        self.inference_worker.start()
+
+        self.load_errors: dict[int, list[str]] = {}
+        self.seismogram_loader = SeismogramLoader(parent=self)
+        self.seismogram_loader.file_loaded.connect(self._on_file_loaded)
+        self.seismogram_loader.file_failed.connect(self._on_file_failed)
+        self.seismogram_loader.progress_changed.connect(self._on_load_progress)
+        self.seismogram_loader.job_finished.connect(self._on_load_finished)
+        self.seismogram_loader.start()
+
+        self.filter_jobs: dict[int, list[SeismogramEntry]] = {}
+        self.filter_errors: dict[int, list[str]] = {}
+        self.filter_worker = FilterWorker(parent=self)
+        self.filter_worker.seismogram_filtered.connect(self._on_seismogram_filtered)
+        self.filter_worker.seismogram_failed.connect(self._on_seismogram_filter_failed)
+        self.filter_worker.progress_changed.connect(self._on_filter_progress)
+        self.filter_worker.job_finished.connect(self._on_filter_finished)
+        self.filter_worker.start()
 
     @pyqtSlot()
     def select_all(self):
-        for trace in self.trace_widgets_list:
-            if self.ui.for_all_chkbox.isChecked():
-                trace.ui.apply_operation_chkbox.setChecked(True)
-            else:
-                trace.ui.apply_operation_chkbox.setChecked(False)
+        for entry in self.ui.seismogram_list.entries():
+            entry.checked = self.ui.for_all_chkbox.isChecked()
+        self.ui.seismogram_list.refreshCheckboxes()
+
+    def checked_entries(self):
+        return [entry for entry in self.ui.seismogram_list.entries() if entry.checked]
 
     @pyqtSlot()
     def apply_NN(self):
-        for trace in self.trace_widgets_list:
-            if trace.ui.apply_operation_chkbox.isChecked():
-                prediction, p_der_indexes, s_der_indexes = self.model.get_prediction(trace.seismogram,
-                                                                                     self.ui.progress_bar)
-                trace.set_prediction(prediction, p_der_indexes, s_der_indexes)
-                trace.enable_sliders()
+        checked_entries = self.checked_entries()
+        if not checked_entries:
+            return
+        job_id = self.inference_worker.submit([entry.seismogram for entry in checked_entries])
+        self.inference_jobs[job_id] = checked_entries
+        self.ui.cancel_NN_btn.setEnabled(True)
+
+    @pyqtSlot()
+    def cancel_NN(self):
+        self.inference_worker.cancel_all()
+
+    def _on_model_loaded(self, model, timings):
+        print(timings)
+        self.model = model
+        if self.inference_settings:
+            self.setWindowTitle(f"WF — НС: {self.inference_settings.describe()}")
+        self.ui.progress_bar.setRange(0, 100)
+        if not self.inference_jobs:
+            self.ui.progress_bar.setVisible(False)
+
+    def _on_model_failed(self, message):
+        self.ui.progress_bar.setRange(0, 100)
+        self.ui.progress_bar.setVisible(False)
+        QMessageBox.critical(self, "Ошибка загрузки НС", message)
+
+    def _on_inference_started(self, job_id, seismograms_count):
+        self.ui.progress_bar.setFormat(f"НС ({seismograms_count}): %p%")
+        self.ui.progress_bar.setValue(0)
+        self.ui.progress_bar.setVisible(True)
+
+    def _on_inference_progress(self, job_id, percentage):
+        self.ui.progress_bar.setValue(percentage)
+
+    def _on_prediction_ready(self, job_id, index, prediction, p_der_indexes, s_der_indexes):
+        entry = self.inference_jobs[job_id][index]
+        entry.set_prediction(prediction, p_der_indexes, s_der_indexes)
+        entry.enable_sliders()
+        trace = self.ui.seismogram_list.traceWidget(entry)
+        if trace:
+            trace.refresh_prediction()
+
+    def _on_inference_finished(self, job_id, cancelled):
+        self.inference_jobs.pop(job_id, None)
+        if self.model and self.model.prediction_cache:
+            self.ui.apply_NN_btn.setToolTip(self.model.prediction_cache.stats())
+        if not self.inference_jobs:
+            self.ui.progress_bar.setVisible(False)
+            self.ui.cancel_NN_btn.setEnabled(False)
+
+    def _on_inference_failed(self, job_id, message):
+        self._on_inference_finished(job_id, False)
+        QMessageBox.critical(self, "Ошибка применения НС", message)
 
     @pyqtSlot()
     def reset_seismograms(self):
-        for trace in self.trace_widgets_list:
-            if trace.ui.apply_operation_chkbox.isChecked():
-                trace.seismogram.reset_trace()
-                trace.reset_prediction()
+        for entry in self.checked_entries():
+            entry.seismogram.reset_trace()
+            entry.reset_prediction()
+            entry.reset_sliders()
+            trace = self.ui.seismogram_list.traceWidget(entry)
+            if trace:
                 trace.refresh_plots()
-                trace.reset_sliders()
+                trace.refresh_prediction()
+        self.show_stage_cache_stats()
+
+    @pyqtSlot()
+    def undo_filter(self):
+        self.__submit_filter_job([entry for entry in self.checked_entries() if entry.seismogram.applied_filters],
+                                 Seismogram.undo_filter)
+
+    def set_filter_enabled(self, index, enabled):
+        self.__submit_filter_job([entry for entry in self.checked_entries()
+                                  if len(entry.seismogram.applied_filters) > index],
+                                 lambda seismogram: seismogram.set_filter_enabled(index, enabled))
+
+    def _on_filters_menu_shown(self):
+        """
+        Lists the filters applied to the checked seismograms, each can be switched off and back on
+        """
+        menu = self.ui.filters_btn.menu()
+        menu.clear()
+        seismograms = [entry.seismogram for entry in self.checked_entries()]
+        filters_count = max((len(seismogram.applied_filters) for seismogram in seismograms), default=0)
+        for index in range(filters_count):
+            seismogram = next(seismogram for seismogram in seismograms if len(seismogram.applied_filters) > index)
+            action = menu.addAction(f"{index + 1}. {self.__describe_filter(seismogram.applied_filters[index])}")
+            action.setCheckable(True)
+            action.setChecked(index not in seismogram.disabled_filters)
+            action.toggled.connect(functools.partial(self.set_filter_enabled, index))
+        if filters_count == 0:
+            menu.addAction("Нет примененных фильтров").setEnabled(False)
+
+    @staticmethod
+    def __describe_filter(spec):
+        order, frequency, filter_type, zero_phase = spec
+        frequency = "–".join(f"{value:g}" for value in frequency) if isinstance(frequency, tuple) else f"{frequency:g}"
+        return f"{filter_type} {frequency} Гц, порядок {order}" + (", без сдвига фазы" if zero_phase else "")
+
+    def show_stage_cache_stats(self):
+        stats = f"{Seismogram.stage_cache.stats()}\n{PagedSeismogram.stage_cache.stats()}"
+        self.ui.undo_filter_btn.setToolTip(stats)
+        self.ui.reset_filters_btn.setToolTip(stats)
 
     @pyqtSlot()
     def invert_selection(self):
-        for trace in self.trace_widgets_list:
-            if trace.ui.apply_operation_chkbox.isChecked():
-                trace.ui.apply_operation_chkbox.setChecked(False)
-            else:
-                trace.ui.apply_operation_chkbox.setChecked(True)
+        for entry in self.ui.seismogram_list.entries():
+            entry.checked = not entry.checked
+        self.ui.seismogram_list.refreshCheckboxes()
 
     @pyqtSlot()
     def apply_filter(self):
@@ -99,86 +231,151 @@ class MainWindow(QtWidgets.QWidget):
                 frequency = [float(dlg.ui.frequency_low_edit.text()), float(dlg.ui.frequency_high_edit.text())]
             else:
                 frequency = float(dlg.ui.frequency_low_edit.text())
-            for trace in self.trace_widgets_list:
-                if trace.ui.apply_operation_chkbox.isChecked():
-                    try:
-                        trace.seismogram.apply_filter(order, frequency, filter_type)
-                        trace.refresh_plots()
-                    except Exception:
-                        QMessageBox.critical(self, "Ошибка примения фильтрации",
-                                             "Заданы некорректные параметры фильтра!")
-                        break
+            checked_entries = self.checked_entries()
+            if not checked_entries:
+                return
+            try:
+                Seismogram.design_filter(order, frequency, filter_type)
+            except Exception:
+                QMessageBox.critical(self, "Ошибка примения фильтрации",
+                                     "Заданы некорректные параметры фильтра!")
+                return
+            zero_phase = dlg.zero_phase
+            self.__submit_filter_job(checked_entries, lambda seismogram: seismogram.apply_filter(
+                order, frequency, filter_type, zero_phase))
+
+    def __submit_filter_job(self, entries, edit):
+        """
+        Changes the filters of the entries' seismograms with edit and evaluates them in filter_worker:
+        a stage missing from the cache is filtered again, which must not block the GUI thread
+        """
+        if not entries:
+            return
+        job_id = self.filter_worker.submit([entry.seismogram for entry in entries], edit)
+        self.filter_jobs[job_id] = entries
+        self.filter_errors[job_id] = []
+        self.ui.filter_progress_bar.setRange(0, len(entries))
+        self.ui.filter_progress_bar.setValue(0)
+        self.ui.filter_progress_bar.setFormat("Фильтрация: %v/%m")
+        self.ui.filter_progress_bar.setVisible(True)
+        # filters and resets of a seismogram must apply in the order they were asked for
+        self.ui.apply_filter_btn.setEnabled(False)
+        self.ui.undo_filter_btn.setEnabled(False)
+        self.ui.filters_btn.setEnabled(False)
+        self.ui.reset_filters_btn.setEnabled(False)
+
+    def _on_seismogram_filtered(self, job_id, index):
+        trace = self.ui.seismogram_list.traceWidget(self.filter_jobs[job_id][index])
+        if trace:
+            trace.refresh_plots()
+
+    def _on_seismogram_filter_failed(self, job_id, index, message):
+        entry = self.filter_jobs[job_id][index]
+        print(f"{entry.seismogram.station_name}: {message}")
+        self.filter_errors[job_id].append(entry.seismogram.station_name)
+
+    def _on_filter_progress(self, job_id, seismograms_done, seismograms_count):
+        self.ui.filter_progress_bar.setRange(0, seismograms_count)
+        self.ui.filter_progress_bar.setValue(seismograms_done)
+
+    def _on_filter_finished(self, job_id):
+        self.filter_jobs.pop(job_id)
+        failed_stations = self.filter_errors.pop(job_id)
+        if not self.filter_jobs:
+            self.ui.filter_progress_bar.setVisible(False)
+            self.ui.apply_filter_btn.setEnabled(True)
+            self.ui.undo_filter_btn.setEnabled(True)
+            self.ui.filters_btn.setEnabled(True)
+            self.ui.reset_filters_btn.setEnabled(True)
+        self.show_stage_cache_stats()
+        if failed_stations:
+            QMessageBox.critical(self, "Ошибка примения фильтрации",
+                                 "Не удалось отфильтровать станции: " + ", ".join(failed_stations))
 
     @pyqtSlot()
     def add_seismograms(self):
         file_paths, _ = QFileDialog.getOpenFileNames(self, 'Открыть файл(ы) сейсмограмм(ы)', '',
                                                      'MSEED files (*.mseed);;All Files (*)')
-        traces = []
         if file_paths:
-            for file in file_paths:
-                try:
-                    sts = self.sort_stations(obspy.read(file))
-                    traces.extend([Seismogram(sts[i:i + 3], file)
-                                   for i in range(0, len(sts), 3)])
-                except Exception:
-                    QMessageBox.critical(
-                        self,
-                        "Ошибка чтения файла",
-                        f"файл {file} поврежден или не поддерживается!",
-                    )
-
-        for trace in traces:
-            wdt = TraceWidget(trace)
-            my_item = QListWidgetItem(self.ui.seismogram_list)
-            my_item.setSizeHint(wdt.size())
-            self.trace_widgets_list.append(wdt)
-            self.ui.seismogram_list.addItem(my_item)
-            self.ui.seismogram_list.setItemWidget(my_item, wdt)
-
-        traces.clear()
+            self.load_errors[self.seismogram_loader.submit(file_paths)] = []
+            self.ui.load_progress_bar.setRange(0, len(file_paths))
+            self.ui.load_progress_bar.setValue(0)
+            self.ui.load_progress_bar.setFormat("Загрузка файлов: %v/%m")
+            self.ui.load_progress_bar.setVisible(True)
+
+    def _on_file_loaded(self, job_id, file_path, seismograms):
+        self.ui.seismogram_list.addEntries([SeismogramEntry(seismogram) for seismogram in seismograms])
+
+    def _on_file_failed(self, job_id, file_path, message):
+        print(f"{file_path}: {message}")
+        self.load_errors[job_id].append(file_path)
+
+    def _on_load_progress(self, job_id, files_done, files_count):
+        self.ui.load_progress_bar.setRange(0, files_count)
+        self.ui.load_progress_bar.setValue(files_done)
+
+    def _on_load_finished(self, job_id):
+        failed_files = self.load_errors.pop(job_id)
+        if not self.load_errors:
+            self.ui.load_progress_bar.setVisible(False)
+        if failed_files:
+            QMessageBox.critical(
+                self,
+                "Ошибка чтения файла",
+                "\n".join(f"файл {file} поврежден или не поддерживается!" for file in failed_files),
+            )
 
     @pyqtSlot()
     def save_seismograms(self):
         files_types = "PNG (*.png);;PKS (*.pks);; RAW (*.raw)"
         dialog = ChkBxFileDialog(chkBxTitle="Сохранить как последовательность", filter=files_types)
 
-        for i in range(len(self.trace_widgets_list)):
-            if self.trace_widgets_list[i].ui.apply_operation_chkbox.isChecked() and \
-                    dialog.exec() == QDialog.DialogCode.Accepted:
+        entries = self.ui.seismogram_list.entries()
+        for i in range(len(entries)):
+            if entries[i].checked and dialog.exec() == QDialog.DialogCode.Accepted:
                 if dialog.chkBx.isChecked():
-                    for j in range(i, len(self.trace_widgets_list)):
-                        self.file_formats[dialog.selectedNameFilter()](self.trace_widgets_list[j], dialog, True)
+                    for j in range(i, len(entries)):
+                        self.file_formats[dialog.selectedNameFilter()](entries[j], dialog, True)
                     break
                 else:
-                    self.file_formats[dialog.selectedNameFilter()](self.trace_widgets_list[i], dialog, False)
+                    self.file_formats[dialog.selectedNameFilter()](entries[i], dialog, False)
 
-    def save_raw(self, trace, dlg, is_long_name):
-        if trace.ui.apply_operation_chkbox.isChecked():
-            file_path = f"{self.get_file_path(trace, dlg, is_long_name)}.raw"
-            raw_data = trace.get_raw()
+    def save_raw(self, entry, dlg, is_long_name):
+        if entry.checked:
+            file_path = f"{self.get_file_path(entry, dlg, is_long_name)}.raw"
+            raw_data = entry.get_raw()
             with open(file_path, 'w') as file:
                 for item in raw_data:
                     file.write(item + '\n')
 
-    def save_as_pks(self, trace, dlg, is_long_name):
-        if trace.ui.apply_operation_chkbox.isChecked():
-            file_path = f"{self.get_file_path(trace, dlg, is_long_name)}.pks"
-            log_file = trace.get_lines_as_pks()
+    def save_as_pks(self, entry, dlg, is_long_name):
+        if entry.checked:
+            file_path = f"{self.get_file_path(entry, dlg, is_long_name)}.pks"
+            log_file = entry.get_lines_as_pks()
             with open(file_path, 'w') as file:
                 for item in log_file:
                     file.write(item + '\n')
 
-    def save_as_png(self, trace, dlg, is_long_name):
-        if trace.ui.apply_operation_chkbox.isChecked():
-            file_path = f"{self.get_file_path(trace, dlg, is_long_name)}.png"
-            image = self.get_complex_image(trace)
+    def save_as_png(self, entry, dlg, is_long_name):
+        if entry.checked:
+            file_path = f"{self.get_file_path(entry, dlg, is_long_name)}.png"
+            trace = self.ui.seismogram_list.traceWidget(entry)
+            if trace:
+                image = self.get_complex_image(trace)
+            else:
+                # rows out of view have no widget, one is rendered off screen for the export
+                trace = TraceWidget(entry)
+                trace.setAttribute(PyQt6.QtCore.Qt.WidgetAttribute.WA_DontShowOnScreen)
+                trace.show()
+                image = self.get_complex_image(trace)
+                trace.deleteLater()
             image.save(file_path)
 
     # TODO
     # file_path = f"{dlg.selectedUrls()[0].toLocalFile()}_{os.path.basename(trace.seismogram.file_path).split('.')[0]}"
-    def get_file_path(self, trace, dlg, is_long_name):
+    def get_file_path(self, entry, dlg, is_long_name):
         if is_long_name:
-            file_path = f"{dlg.selectedUrls()[0].toLocalFile()}_{os.path.basename(trace.seismogram.file_path)}_{trace.seismogram.station_name}"
+            file_path = f"{dlg.selectedUrls()[0].toLocalFile()}_{os.path.basename(entry.seismogram.file_path)}_{entry.seismogram.station_name}"
         else:
             file_path = f"{dlg.selectedUrls()[0].toLocalFile()}"
         return file_path
@@ -212,27 +409,58 @@ class MainWindow(QtWidgets.QWidget):
     @pyqtSlot()
     def clear_seismogram_list(self):
         self.ui.seismogram_list.clear()
-        self.trace_widgets_list.clear()
+
+    def closeEvent(self, event):
+        self.inference_worker.stop()
+        self.seismogram_loader.stop()
+        self.filter_worker.stop()
+        QtWidgets.QWidget.closeEvent(self, event)
 
     def keyPressEvent(self, event):
         if event.key() == PyQt6.QtCore.Qt.Key.Key_Delete and len(self.ui.seismogram_list.selectedItems()) > 0:
             list_items = self.ui.seismogram_list.selectedItems()
             for item in list_items:
-                widget = self.ui.seismogram_list.itemWidget(item)
-                self.trace_widgets_list.remove(widget)
                 self.ui.seismogram_list.takeItem(self.ui.seismogram_list.row(item))
         event.accept()
 
-    def sort_stations(self, st):
-        sorted_list = sorted(st, key=lambda x: (x.stats.station, x.stats.channel))
-        sorted_list[::3], sorted_list[1::3] = sorted_list[1::3], sorted_list[::3]
-        return sorted_list
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=ModelParameters.BACKENDS, default="keras",
+                        help="движок НС; tflite-модели конвертируются при первом запуске")
+    parser.add_argument("--calibration", nargs="*", default=[],
+                        help="mseed-файлы для калибровки tflite-int8")
+    parser.add_argument("--adaptive-stride", type=float, metavar="THRESHOLD",
+                        help="грубый проход с уточнением вокруг окон, где вероятность не-шума выше порога")
+    parser.add_argument("--optimize-graph", action="store_true",
+                        help="свернуть BatchNormalization в свёртки и убрать Dropout (движок keras)")
+    parser.add_argument("--xla", action="store_true", help="компилировать граф keras через XLA")
+    return parser.parse_known_args()
+
+
+def create_network_model(arguments, inference_settings: InferenceSettings):
+    start_time = time.perf_counter()
+    from NeuralNetworkModel import NeuralNetworkModel
+    print(f"tensorflow import: {time.perf_counter() - start_time:.2f} s")
+    inference_settings.apply()
+
+    calibration_seismograms = [seismogram for file in arguments.calibration for seismogram in Seismogram.read_file(file)]
+    return NeuralNetworkModel(shared_stft=True, prediction_cache=PredictionCache(),
+                              backend=arguments.backend, calibration_seismograms=calibration_seismograms,
+                              adaptive_stride=arguments.adaptive_stride is not None,
+                              adaptive_threshold=arguments.adaptive_stride if arguments.adaptive_stride is not None else 0.2,
+                              optimize_graph=arguments.optimize_graph, jit_compile=arguments.xla,
+                              batch_size=inference_settings.batch_size)
 
 
 # Press the green button in the gutter to run the script.
 if __name__ == '__main__':
-    network_model = NeuralNetworkModel()
-    app = QtWidgets.QApplication(sys.argv)
-    window = MainWindow(network_model)
+    imports_time = time.perf_counter() - STARTUP_TIME
+    arguments, qt_arguments = parse_arguments()
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_arguments)
+    inference_settings = InferenceSettings.load()
+    print(f"inference settings: {inference_settings.describe()}")
+    window = MainWindow(functools.partial(create_network_model, arguments, inference_settings), inference_settings)
     window.show()
+    print(f"window shown in {time.perf_counter() - STARTUP_TIME:.2f} s (imports {imports_time:.2f} s)")
     app.exec()
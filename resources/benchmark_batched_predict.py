@@ -0,0 +1,51 @@
+import argparse
+import time
+
+import numpy as np
+
+from NeuralNetworkModel import NeuralNetworkModel
+from Seismogram import Seismogram
+from resources.measure_memory import SyntheticSeismogram
+
+
+def per_trace_loop(model, seismograms):
+    """
+    The predictions as get_prediction used to make them, one Model.predict call per seismogram
+    """
+    return [model.model.predict(np.asarray(model.get_inputs(seismogram)), batch_size=model.batch_size, verbose=0)
+            for seismogram in seismograms]
+
+
+def benchmark_batched_predict(seismograms_count, seconds, repeats):
+    model = NeuralNetworkModel()
+    model.warm_up()
+    seismograms = []
+    for i in range(seismograms_count):
+        seismogram = SyntheticSeismogram(int(seconds * (1 + i % 3) * Seismogram.NN_sampling_rate))
+        seismogram.traces = seismogram.traces * (i + 1)
+        seismograms.append(seismogram)
+    windows_count = sum(len(model.get_inputs(seismogram)) for seismogram in seismograms)
+
+    for name, predict in (("per-trace loop", lambda: per_trace_loop(model, seismograms)),
+                          ("batched", lambda: [prediction for prediction, _, _ in
+                                               model.get_predictions(seismograms, callbacks=[])])):
+        predict()
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            predictions = predict()
+        elapsed = (time.perf_counter() - start_time) / repeats
+        if name == "per-trace loop":
+            reference = predictions
+        difference = max(np.max(np.abs(a - b)) for a, b in zip(reference, predictions))
+        print(f"{name:15} {elapsed:6.2f} s, {windows_count / elapsed:8.1f} windows/sec, "
+              f"max difference from the loop {difference:.2e}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="throughput of one predict call per seismogram versus "
+                                                 "the batched get_predictions")
+    parser.add_argument("--seismograms", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=60, help="length of the shortest synthetic trace")
+    parser.add_argument("--repeats", type=int, default=3)
+    arguments = parser.parse_args()
+    benchmark_batched_predict(arguments.seismograms, arguments.seconds, arguments.repeats)
@@ -0,0 +1,62 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import scipy
+
+from Seismogram import Seismogram
+
+
+def benchmark_filtering(triads_count, duration, order, frequency, filter_type, zero_phase):
+    """
+    Time to filter triads_count triads of duration seconds serially, redesigning the filter every time as
+    apply_filter used to, and on thread pools of growing size with the memoized design
+    """
+    rng = np.random.default_rng(0)
+    triads = [rng.standard_normal((3, int(duration * Seismogram.NN_sampling_rate))) for _ in range(triads_count)]
+
+    Seismogram.design_filter(order, frequency, filter_type)
+    start_time = time.perf_counter()
+    for _ in range(100):
+        scipy.signal.butter(order, frequency, filter_type, fs=Seismogram.NN_sampling_rate, output='sos')
+    design_time = (time.perf_counter() - start_time) / 100
+    start_time = time.perf_counter()
+    for _ in range(100):
+        Seismogram.design_filter(order, frequency, filter_type)
+    cached_time = (time.perf_counter() - start_time) / 100
+    print(f"filter design {design_time * 1e6:.0f} us, memoized {cached_time * 1e6:.1f} us")
+
+    start_time = time.perf_counter()
+    serial = []
+    for triad in triads:
+        sos = scipy.signal.butter(order, frequency, filter_type, fs=Seismogram.NN_sampling_rate, output='sos')
+        serial.append(Seismogram.filter_traces(sos, triad, zero_phase))
+    serial_time = time.perf_counter() - start_time
+    print(f"{triads_count} triads of {duration:g} s, serial: {serial_time:.2f} s")
+
+    sos = Seismogram.design_filter(order, frequency, filter_type)
+    workers_count = 1
+    while workers_count <= (os.cpu_count() or 1):
+        with ThreadPoolExecutor(workers_count) as executor:
+            start_time = time.perf_counter()
+            filtered = list(executor.map(lambda triad: Seismogram.filter_traces(sos, triad, zero_phase), triads))
+            pool_time = time.perf_counter() - start_time
+        assert all(np.array_equal(a, b) for a, b in zip(serial, filtered))
+        print(f"  {workers_count:3} threads: {pool_time:.2f} s, speed-up {serial_time / pool_time:.2f}")
+        workers_count *= 2
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="serial versus thread pool filtering of many triads")
+    parser.add_argument("--triads", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=3600, help="trace length in seconds")
+    parser.add_argument("--order", type=int, default=4)
+    parser.add_argument("--frequency", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--type", default="bandpass")
+    parser.add_argument("--zero-phase", action="store_true")
+    arguments = parser.parse_args()
+    frequency = arguments.frequency if len(arguments.frequency) > 1 else arguments.frequency[0]
+    benchmark_filtering(arguments.triads, arguments.duration, arguments.order, frequency, arguments.type,
+                        arguments.zero_phase)
@@ -0,0 +1,44 @@
+import argparse
+import time
+
+import numpy as np
+
+from NeuralNetworkModel import NeuralNetworkModel
+
+
+def measure_latency(model, windows, repeats):
+    model.predict_windows(windows)
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        prediction = model.predict_windows(windows)
+    return (time.perf_counter() - start_time) / (repeats * len(windows)), prediction
+
+
+def benchmark_optimized_graph(windows_count, repeats, shared_stft, tolerance):
+    # whole batches only, so that XLA compiles a single batch shape
+    windows_count = max(windows_count // NeuralNetworkModel.BATCH_SIZE, 1) * NeuralNetworkModel.BATCH_SIZE
+    windows = np.random.default_rng(0).standard_normal(
+        (windows_count, NeuralNetworkModel.WAVE_LENGTH, NeuralNetworkModel.NUMBER_OF_TRACES)).cumsum(axis=1)
+
+    reference_model = NeuralNetworkModel(shared_stft=shared_stft)
+
+    reference_latency, reference = measure_latency(reference_model, windows, repeats)
+    print(f"original graph: {reference_latency * 1000:.3f} ms/window")
+    for name, parameters in [("folded BN, no dropout", {"optimize_graph": True}),
+                             ("folded BN, no dropout, XLA", {"optimize_graph": True, "jit_compile": True})]:
+        model = NeuralNetworkModel(shared_stft=shared_stft, **parameters)
+        latency, prediction = measure_latency(model, windows, repeats)
+        difference = float(np.max(np.abs(prediction - reference)))
+        print(f"{name}: {latency * 1000:.3f} ms/window ({reference_latency / latency:.2f}x), "
+              f"max probability difference {difference:.2e} "
+              f"({'within' if difference <= tolerance else 'OUTSIDE'} tolerance {tolerance})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="per-window latency of the optimized inference graph versus the original")
+    parser.add_argument("--windows", type=int, default=4096, help="number of synthetic windows per pass")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--shared-stft", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=1e-4, help="allowed probability difference")
+    arguments = parser.parse_args()
+    benchmark_optimized_graph(arguments.windows, arguments.repeats, arguments.shared_stft, arguments.tolerance)
@@ -0,0 +1,40 @@
+import argparse
+import time
+
+import numpy as np
+
+from NeuralNetworkModel import NeuralNetworkModel, WindowSequence
+from Seismogram import Seismogram
+from resources.measure_memory import SyntheticSeismogram
+
+
+def time_calls(predict, inputs, repeats):
+    predict(WindowSequence([inputs], NeuralNetworkModel.BATCH_SIZE))
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        prediction = predict(WindowSequence([inputs], NeuralNetworkModel.BATCH_SIZE))
+    return (time.perf_counter() - start_time) / repeats, prediction
+
+
+def benchmark_predict_overhead(durations, repeats, shared_stft):
+    model = NeuralNetworkModel(shared_stft=shared_stft)
+    model.warm_up()
+    for duration in durations:
+        seismogram = SyntheticSeismogram(int(duration * Seismogram.NN_sampling_rate))
+        inputs = np.asarray(model.get_inputs(seismogram))
+        keras_time, keras_prediction = time_calls(
+            lambda windows: model.inference_model.predict(windows, verbose=0), inputs, repeats)
+        lean_time, lean_prediction = time_calls(model.predict_lean, inputs, repeats)
+        print(f"{duration:g} s ({len(inputs)} windows): keras predict {keras_time * 1000:.1f} ms, "
+              f"lean path {lean_time * 1000:.1f} ms, {(keras_time - lean_time) * 1000:.1f} ms saved per call, "
+              f"max probability difference {np.max(np.abs(keras_prediction - lean_prediction)):.2e}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="per-call time of keras Model.predict versus the lean predict path")
+    parser.add_argument("durations", nargs="*", type=float, default=[2, 10, 60, 600],
+                        help="seismogram lengths in seconds at 100 Hz")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--shared-stft", action="store_true")
+    arguments = parser.parse_args()
+    benchmark_predict_overhead(arguments.durations, arguments.repeats, arguments.shared_stft)
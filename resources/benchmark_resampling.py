@@ -0,0 +1,71 @@
+import argparse
+import time
+
+import numpy as np
+import obspy
+
+from PolyphaseResampler import PolyphaseResampler
+from Seismogram import Seismogram
+
+
+def make_traces(sampling_rate, duration, in_band_frequency, out_of_band_frequency):
+    """
+    Three traces of an in-band tone plus an equally strong tone above the 50 Hz Nyquist frequency of the network
+    """
+    times = np.arange(int(duration * sampling_rate)) / sampling_rate
+    data = np.sin(2 * np.pi * in_band_frequency * times) + np.sin(2 * np.pi * out_of_band_frequency * times)
+    return [obspy.Trace(data.copy(), header={"sampling_rate": sampling_rate, "channel": channel})
+            for channel in ("HHN", "HHE", "HHZ")], times
+
+
+def amplitude_at(data, frequency):
+    spectrum = np.abs(np.fft.rfft(data * np.hanning(len(data)))) / (np.sum(np.hanning(len(data))) / 2)
+    frequencies = np.fft.rfftfreq(len(data), 1 / Seismogram.NN_sampling_rate)
+    return spectrum[np.argmin(np.abs(frequencies - frequency))]
+
+
+def benchmark_resampling(sampling_rates, duration, in_band_frequency, repeats):
+    target_rate = Seismogram.NN_sampling_rate
+    for sampling_rate in sampling_rates:
+        out_of_band_frequency = min(0.8 * sampling_rate / 2, target_rate / 2 + 20)
+        alias_frequency = abs(out_of_band_frequency - target_rate * round(out_of_band_frequency / target_rate))
+        traces, times = make_traces(sampling_rate, duration, in_band_frequency, out_of_band_frequency)
+
+        resampler = PolyphaseResampler(sampling_rate, target_rate)
+        # the first calls import and set up the interpolation code
+        traces[0].copy().interpolate(sampling_rate=target_rate)
+        resampler.resample(traces[0].data)
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            interpolated = np.array([trace.copy().interpolate(sampling_rate=target_rate).data for trace in traces])
+        interpolate_time = (time.perf_counter() - start_time) / repeats
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            resampled = resampler.resample(np.array([trace.data for trace in traces]))
+        polyphase_time = (time.perf_counter() - start_time) / repeats
+
+        expected = np.sin(2 * np.pi * in_band_frequency * np.arange(resampled.shape[-1]) / target_rate)
+        edge = resampler.margin
+        print(f"{sampling_rate:g} Hz -> {target_rate} Hz, {duration:g} s x 3 channels "
+              f"(tone of {out_of_band_frequency:g} Hz aliases to {alias_frequency:g} Hz)")
+        for name, elapsed, data in (("obspy interpolate", interpolate_time, interpolated),
+                                    ("polyphase", polyphase_time, resampled)):
+            samples = min(data.shape[-1], len(expected))
+            error = data[0, edge:samples - edge] - expected[edge:samples - edge]
+            print(f"  {name:18}{elapsed * 1000:9.1f} ms, "
+                  f"{in_band_frequency:g} Hz amplitude {amplitude_at(data[0], in_band_frequency):.3f}, "
+                  f"alias amplitude {amplitude_at(data[0], alias_frequency):.4f}, "
+                  f"RMS error versus the in-band tone {np.sqrt(np.mean(error ** 2)):.4f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="speed and spectral fidelity of obspy interpolate versus "
+                                                 "polyphase resampling to the network's sampling rate")
+    parser.add_argument("sampling_rates", nargs="*", type=float, default=[200, 500, 1000])
+    parser.add_argument("--duration", type=float, default=3600, help="trace length in seconds")
+    parser.add_argument("--frequency", type=float, default=5, help="in-band tone in Hz")
+    parser.add_argument("--repeats", type=int, default=3)
+    arguments = parser.parse_args()
+    benchmark_resampling(arguments.sampling_rates, arguments.duration, arguments.frequency, arguments.repeats)
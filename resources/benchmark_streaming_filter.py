@@ -0,0 +1,88 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from MiniSeedIndex import MiniSeedIndex
+from Seismogram import Seismogram, PagedSeismogram
+from StreamingFilter import StreamingFilter
+
+
+def measure(function):
+    """
+    Result, seconds and peak of the memory allocated while running function
+    """
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark_streaming_filter(hours, zero_phase, chunk_samples):
+    traces = np.random.default_rng(0).standard_normal((3, int(hours * 3600 * Seismogram.NN_sampling_rate)))
+    sos = Seismogram.design_filter(4, [1, 10], "bandpass")
+    streaming_filter = StreamingFilter(sos, zero_phase, chunk_samples)
+    one_shot = scipy.signal.sosfiltfilt if zero_phase else scipy.signal.sosfilt
+    print(f"{hours:g} h x 3 channels, {traces.nbytes / 1024 ** 2:.0f} MB, "
+          f"{'sosfiltfilt' if zero_phase else 'sosfilt'}, chunks of {chunk_samples} samples")
+
+    expected, elapsed, peak = measure(lambda: one_shot(sos, traces))
+    print(f"  one shot    {elapsed:6.2f} s, peak {peak / 1024 ** 2:7.1f} MB")
+    filtered, elapsed, peak = measure(lambda: streaming_filter.filter(traces))
+    print(f"  streaming   {elapsed:6.2f} s, peak {peak / 1024 ** 2:7.1f} MB, identical {np.array_equal(expected, filtered)}")
+    del filtered
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = np.lib.format.open_memmap(os.path.join(directory, "source.npy"), mode="w+",
+                                           dtype=traces.dtype, shape=traces.shape)
+        source[:] = traces
+        output = np.lib.format.open_memmap(os.path.join(directory, "output.npy"), mode="w+",
+                                           dtype=np.float64, shape=traces.shape)
+        _, elapsed, peak = measure(lambda: streaming_filter.filter(source, output))
+        print(f"  memory maps {elapsed:6.2f} s, peak {peak / 1024 ** 2:7.1f} MB, identical {np.array_equal(expected, output)}")
+        del source, output
+
+
+def benchmark_paged_file(file_path, zero_phase, chunk_samples):
+    """
+    Filters the first seismogram of a MiniSEED file page by page into a memory map, then the way
+    PagedSeismogram filters it, into the temporary file of new PagedTraces
+    """
+    index = MiniSeedIndex.load(file_path)
+    station, _ = index.stream_ids()[0]
+    channels = [channel for stream_station, channel in index.stream_ids() if stream_station == station][:3]
+    seismogram = PagedSeismogram(file_path, index, station, channels)
+    traces = seismogram.traces
+    sos = Seismogram.design_filter(4, [1, 10], "bandpass")
+    streaming_filter = StreamingFilter(sos, zero_phase, chunk_samples)
+    with tempfile.TemporaryDirectory() as directory:
+        output = np.lib.format.open_memmap(os.path.join(directory, "output.npy"), mode="w+",
+                                           dtype=np.float64, shape=traces.shape)
+        _, elapsed, peak = measure(lambda: streaming_filter.filter(traces, output))
+        print(f"{file_path}: {traces.shape[1] / Seismogram.NN_sampling_rate / 3600:.1f} h paged, "
+              f"{elapsed:.2f} s, peak {peak / 1024 ** 2:.1f} MB with a page cache of up to "
+              f"{traces.CACHE_BYTES / 1024 ** 2:.0f} MB")
+        filtered, elapsed, peak = measure(lambda: Seismogram.filter_traces(sos, traces, zero_phase))
+        pages = np.concatenate([filtered.page(i) for i in range(filtered.pages_count)], axis=1)
+        print(f"  filtered PagedTraces {elapsed:.2f} s, peak {peak / 1024 ** 2:.1f} MB, "
+              f"{filtered.nbytes / 1024 ** 2:.0f} MB on disk, identical {np.array_equal(output, pages)}")
+        del output, pages
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="one-shot versus chunked filtering of long traces")
+    parser.add_argument("--hours", type=float, default=6)
+    parser.add_argument("--zero-phase", action="store_true")
+    parser.add_argument("--chunk", type=int, default=StreamingFilter.CHUNK_SAMPLES, help="samples per chunk")
+    parser.add_argument("--file", help="MiniSEED file to filter through PagedTraces as well")
+    arguments = parser.parse_args()
+    benchmark_streaming_filter(arguments.hours, arguments.zero_phase, arguments.chunk)
+    if arguments.file:
+        benchmark_paged_file(arguments.file, arguments.zero_phase, arguments.chunk)
@@ -0,0 +1,63 @@
+import argparse
+
+import numpy as np
+
+from NeuralNetworkModel import NeuralNetworkModel
+from Seismogram import Seismogram
+
+
+def get_picks(prediction, der_indexes, column, threshold):
+    return np.array([index for index in der_indexes if prediction[index, column] > threshold], dtype=int)
+
+
+def count_matches(reference_picks, candidate_picks, tolerance):
+    if len(reference_picks) == 0 or len(candidate_picks) == 0:
+        return 0
+    candidate_picks = np.sort(candidate_picks)
+    positions = np.searchsorted(candidate_picks, reference_picks)
+    left = candidate_picks[np.clip(positions - 1, 0, len(candidate_picks) - 1)]
+    right = candidate_picks[np.clip(positions, 0, len(candidate_picks) - 1)]
+    distances = np.minimum(np.abs(left - reference_picks), np.abs(right - reference_picks))
+    return int(np.sum(distances <= tolerance))
+
+
+def compare_backends(file_paths, backend, calibration_paths, threshold, tolerance, shared_stft):
+    seismograms = [seismogram for file in file_paths for seismogram in Seismogram.read_file(file)]
+    calibration_seismograms = [seismogram for file in calibration_paths for seismogram in Seismogram.read_file(file)]
+
+    reference_model = NeuralNetworkModel(shared_stft=shared_stft)
+    candidate_model = NeuralNetworkModel(shared_stft=shared_stft, backend=backend,
+                                         calibration_seismograms=calibration_seismograms or seismograms)
+    reference = reference_model.get_predictions(seismograms, callbacks=[])
+    candidate = candidate_model.get_predictions(seismograms, callbacks=[])
+
+    max_difference = 0.0
+    totals = {"P": [0, 0, 0], "S": [0, 0, 0]}
+    for (ref_pred, ref_p, ref_s), (cand_pred, cand_p, cand_s) in zip(reference, candidate):
+        max_difference = max(max_difference, float(np.max(np.abs(ref_pred - cand_pred))))
+        for name, column, ref_der, cand_der in [("P", 0, ref_p, cand_p), ("S", 1, ref_s, cand_s)]:
+            ref_picks = get_picks(ref_pred, ref_der, column, threshold)
+            cand_picks = get_picks(cand_pred, cand_der, column, threshold)
+            totals[name][0] += count_matches(ref_picks, cand_picks, tolerance)
+            totals[name][1] += len(ref_picks)
+            totals[name][2] += len(cand_picks)
+
+    print(f"{backend} vs keras on {len(seismograms)} seismograms")
+    print(f"max probability difference: {max_difference:.6f}")
+    for name, (matched, reference_count, candidate_count) in totals.items():
+        agreement = matched / reference_count * 100 if reference_count > 0 else 100.0
+        print(f"{name}: {matched}/{reference_count} keras picks matched within {tolerance} windows "
+              f"({agreement:.2f}%), {candidate_count} {backend} picks")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="pick agreement of a tflite backend versus keras")
+    parser.add_argument("files", nargs="+", help="mseed files to compare on")
+    parser.add_argument("--backend", choices=NeuralNetworkModel.BACKENDS[1:], default="tflite-int8")
+    parser.add_argument("--calibration", nargs="*", default=[], help="mseed files for int8 calibration")
+    parser.add_argument("--threshold", type=float, default=0.5, help="minimal P/S probability of a pick")
+    parser.add_argument("--tolerance", type=int, default=1, help="allowed pick shift in windows")
+    parser.add_argument("--shared-stft", action="store_true")
+    arguments = parser.parse_args()
+    compare_backends(arguments.files, arguments.backend, arguments.calibration,
+                     arguments.threshold, arguments.tolerance, arguments.shared_stft)
@@ -0,0 +1,37 @@
+import argparse
+
+from NeuralNetworkModel import NeuralNetworkModel
+from Seismogram import Seismogram
+from resources.compare_backends import get_picks, count_matches
+
+
+def evaluate_adaptive_stride(file_paths, adaptive_threshold, pick_threshold, tolerance):
+    seismograms = [seismogram for file in file_paths for seismogram in Seismogram.read_file(file)]
+    model = NeuralNetworkModel(shared_stft=True, adaptive_threshold=adaptive_threshold)
+    full = model.get_predictions(seismograms, callbacks=[])
+    model.adaptive_stride = True
+    adaptive = model.get_predictions(seismograms, callbacks=[])
+
+    total_windows = sum(len(prediction) for prediction, _, _ in full)
+    print(f"{model.skipped_windows} of {total_windows} windows skipped "
+          f"({model.skipped_windows / max(total_windows, 1) * 100:.1f}%)")
+    for name, column, der_position in [("P", 0, 1), ("S", 1, 2)]:
+        matched, reference_count = 0, 0
+        for full_result, adaptive_result in zip(full, adaptive):
+            full_picks = get_picks(full_result[0], full_result[der_position], column, pick_threshold)
+            adaptive_picks = get_picks(adaptive_result[0], adaptive_result[der_position], column, pick_threshold)
+            matched += count_matches(full_picks, adaptive_picks, tolerance)
+            reference_count += len(full_picks)
+        recall = matched / reference_count * 100 if reference_count > 0 else 100.0
+        print(f"{name} recall versus the full fine scan: {matched}/{reference_count} ({recall:.2f}%)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="windows skipped and pick recall of the adaptive stride mode")
+    parser.add_argument("files", nargs="+", help="mseed files to evaluate on")
+    parser.add_argument("--adaptive-threshold", type=float, default=0.2,
+                        help="non-noise probability of a coarse window that triggers the fine scan around it")
+    parser.add_argument("--threshold", type=float, default=0.5, help="minimal P/S probability of a pick")
+    parser.add_argument("--tolerance", type=int, default=0, help="allowed pick shift in windows")
+    arguments = parser.parse_args()
+    evaluate_adaptive_stride(arguments.files, arguments.adaptive_threshold, arguments.threshold, arguments.tolerance)
@@ -0,0 +1,57 @@
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from NeuralNetworkModel import NeuralNetworkModel
+from Seismogram import Seismogram
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class SyntheticSeismogram:
+    """
+    Random walk N/E/Z traces with the attributes NeuralNetworkModel reads
+    """
+
+    def __init__(self, samples_count):
+        self.traces = np.random.default_rng(0).standard_normal((3, samples_count)).cumsum(axis=1)
+        self.data_hash = None
+        self.filters = []
+
+    def snapshot(self):
+        return tuple(self.filters), self.traces
+
+
+def peak_rss_megabytes():
+    if resource is None:
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_memory(hours, shared_stft, memory_limit):
+    model = NeuralNetworkModel(shared_stft=shared_stft, memory_limit=memory_limit)
+    seismogram = SyntheticSeismogram(int(hours * 3600 * Seismogram.NN_sampling_rate))
+    rss_before = peak_rss_megabytes()
+
+    tracemalloc.start()
+    model.get_predictions([seismogram], callbacks=[])
+    _, numpy_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"trace of {hours} h: {seismogram.traces.nbytes / 1024 ** 2:.1f} MB of samples")
+    print(f"high-water mark of python/numpy allocations during get_predictions: {numpy_peak / 1024 ** 2:.1f} MB")
+    print(f"peak RSS growth during get_predictions: {peak_rss_megabytes() - rss_before:.1f} MB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="memory high-water mark of get_predictions for a given trace length")
+    parser.add_argument("hours", type=float, help="trace length in hours at 100 Hz")
+    parser.add_argument("--shared-stft", action="store_true")
+    parser.add_argument("--memory-limit", type=int, default=NeuralNetworkModel.MEMORY_LIMIT // 1024 ** 2,
+                        help="memory ceiling of the spectrogram chunks in MB")
+    arguments = parser.parse_args()
+    measure_memory(arguments.hours, arguments.shared_stft, arguments.memory_limit * 1024 ** 2)
@@ -0,0 +1,100 @@
+import argparse
+import io
+import os
+import threading
+import time
+
+import obspy
+
+from NeuralNetworkModel import NeuralNetworkModel
+from Seismogram import Seismogram
+from StreamingDetector import StreamingDetector
+
+COMPONENTS = {"N": 0, "1": 0, "E": 1, "2": 1, "Z": 2}
+
+
+def simulate_feed(source_path, target_path, speed, slice_seconds=1.0, record_length=512):
+    """
+    Local stand-in for a real-time feed: appends the source file to the target as MiniSEED records, slice by slice
+    """
+    stream = obspy.read(source_path)
+    start_time = min(trace.stats.starttime for trace in stream)
+    end_time = max(trace.stats.endtime for trace in stream)
+    with open(target_path, 'wb') as target:
+        current_time = start_time
+        while current_time <= end_time:
+            chunk = stream.slice(current_time, current_time + slice_seconds, nearest_sample=False)
+            chunk = obspy.Stream([trace for trace in chunk if trace.stats.npts > 0])
+            if len(chunk) > 0:
+                buffer = io.BytesIO()
+                chunk.write(buffer, format="MSEED", reclen=record_length)
+                target.write(buffer.getvalue())
+                target.flush()
+            current_time += slice_seconds + 1 / stream[0].stats.sampling_rate
+            time.sleep(slice_seconds / speed)
+
+
+def tail_records(file_path, record_length=512, poll_interval=0.2, stop_event=None):
+    """
+    Yields the traces of complete MiniSEED records appended to file_path until stop_event is set
+    """
+    offset = 0
+    while True:
+        finished = stop_event is not None and stop_event.is_set()
+        size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        complete_size = (size - offset) // record_length * record_length
+        if complete_size == 0:
+            if finished:
+                return
+            time.sleep(poll_interval)
+            continue
+        with open(file_path, 'rb') as file:
+            file.seek(offset)
+            data = file.read(complete_size)
+        offset += complete_size
+        yield from obspy.read(io.BytesIO(data), format="MSEED")
+
+
+def stream_picks(file_path, record_length, thresholds, source_path=None, speed=1.0):
+    model = NeuralNetworkModel()
+    detectors = {}
+    stop_event = threading.Event()
+    if source_path:
+        def feed():
+            simulate_feed(source_path, file_path, speed, record_length=record_length)
+            stop_event.set()
+        threading.Thread(target=feed, daemon=True).start()
+
+    for trace in tail_records(file_path, record_length, stop_event=stop_event):
+        if trace.stats.sampling_rate != Seismogram.NN_sampling_rate:
+            print(f"{trace.id}: sampling rate {trace.stats.sampling_rate} is not {Seismogram.NN_sampling_rate} Hz, skipped")
+            continue
+        station = trace.stats.station
+        if station not in detectors:
+            detectors[station] = StreamingDetector(model, trace.stats.starttime.timestamp, *thresholds)
+            print(f"{station}: picks are emitted {detectors[station].latency():.1f} s after arrival at best")
+        samples_by_channel = [None] * NeuralNetworkModel.NUMBER_OF_TRACES
+        samples_by_channel[COMPONENTS[trace.stats.channel[-1]]] = trace.data
+        for pick in detectors[station].append(samples_by_channel, trace.stats.starttime.timestamp):
+            print(f"{station} {pick.phase} {obspy.UTCDateTime(pick.timestamp)} "
+                  f"p={pick.probability:.3f} noise={pick.noise_probability:.3f}")
+
+    for station, detector in detectors.items():
+        for pick in detector.finish():
+            print(f"{station} {pick.phase} {obspy.UTCDateTime(pick.timestamp)} "
+                  f"p={pick.probability:.3f} noise={pick.noise_probability:.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="real-time P/S picking on a growing MiniSEED file")
+    parser.add_argument("file", help="MiniSEED file that records are appended to")
+    parser.add_argument("--simulate", help="replay this MiniSEED file into the feed file")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor")
+    parser.add_argument("--record-length", type=int, default=512)
+    parser.add_argument("--p-threshold", type=float, default=0.5)
+    parser.add_argument("--s-threshold", type=float, default=0.5)
+    parser.add_argument("--noise-threshold", type=float, default=0.8)
+    arguments = parser.parse_args()
+    stream_picks(arguments.file, arguments.record_length,
+                 (arguments.p_threshold, arguments.s_threshold, arguments.noise_threshold),
+                 arguments.simulate, arguments.speed)
@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from InferenceSettings import InferenceSettings
+from ModelParameters import ModelParameters
+from Seismogram import Seismogram
+
+
+def get_thread_settings():
+    """
+    Candidate (intra-op, inter-op) pools for this machine; zero keeps the TensorFlow default
+    """
+    cores = os.cpu_count() or 1
+    intra_op_threads = sorted({0} | {max(cores // divisor, 1) for divisor in (1, 2, 4)}, reverse=True)
+    return [(intra, inter) for intra in intra_op_threads for inter in (0, 1, 2)]
+
+
+def measure(intra_op_threads, inter_op_threads, seconds, repeats):
+    """
+    Best windows/sec of get_predictions on a synthetic trace under one thread setting.
+    Thread pools cannot change once tensorflow has started, so every setting runs in its own process
+    """
+    InferenceSettings(intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads).apply()
+    from NeuralNetworkModel import NeuralNetworkModel
+    from resources.measure_memory import SyntheticSeismogram
+
+    seismogram = SyntheticSeismogram(int(seconds * Seismogram.NN_sampling_rate))
+    model = NeuralNetworkModel(shared_stft=True, batch_size=ModelParameters.BATCH_SIZE)
+    model.warm_up()
+    elapsed_times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        prediction, _, _ = model.get_predictions([seismogram], callbacks=[])[0]
+        elapsed_times.append(time.perf_counter() - start_time)
+    print(json.dumps(len(prediction) / min(elapsed_times)))
+
+
+def tune_inference(seconds, repeats, settings_path):
+    """
+    Saves the fastest TensorFlow thread pools. The batch size stays BATCH_SIZE: MaxABSScaler normalizes every
+    window by the maximum over its batch, so another batch size regroups the windows and changes the probabilities
+    """
+    best = InferenceSettings()
+    for intra_op_threads, inter_op_threads in get_thread_settings():
+        process = subprocess.run([sys.executable, "-m", "resources.tune_inference", "--measure",
+                                  str(intra_op_threads), str(inter_op_threads),
+                                  "--seconds", str(seconds), "--repeats", str(repeats)],
+                                 capture_output=True, text=True)
+        if process.returncode != 0:
+            print(f"threads {intra_op_threads}/{inter_op_threads} failed:\n{process.stderr[-2000:]}")
+            continue
+        windows_per_second = json.loads(process.stdout.strip().splitlines()[-1])
+        print(f"threads {intra_op_threads}/{inter_op_threads}: {windows_per_second:.1f} windows/sec")
+        if best.windows_per_second is None or windows_per_second > best.windows_per_second:
+            best = InferenceSettings(ModelParameters.BATCH_SIZE, intra_op_threads, inter_op_threads,
+                                     windows_per_second)
+
+    if best.windows_per_second is None:
+        print("no setting could be measured, settings are left unchanged")
+        return
+    best.save(settings_path)
+    print(f"saved to {settings_path}: {best.describe()}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="finds the fastest tensorflow thread pools for this machine "
+                                                 "and saves them for main.py")
+    parser.add_argument("--seconds", type=float, default=600, help="length of the synthetic trace at 100 Hz")
+    parser.add_argument("--repeats", type=int, default=3, help="passes per setting, the fastest one counts")
+    parser.add_argument("--settings", default=InferenceSettings.SETTINGS_PATH)
+    parser.add_argument("--measure", nargs=2, type=int, metavar=("INTRA", "INTER"), help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+    if arguments.measure:
+        measure(*arguments.measure, arguments.seconds, arguments.repeats)
+    else:
+        tune_inference(arguments.seconds, arguments.repeats, arguments.settings)
@@ -12,11 +12,14 @@ from PyQt6 import QtCore, QtGui, QtWidgets
 class Ui_Dialog(object):
     def setupUi(self, Dialog):
         Dialog.setObjectName("Dialog")
-        Dialog.resize(370, 230)
-        Dialog.setMinimumSize(QtCore.QSize(370, 230))
-        Dialog.setMaximumSize(QtCore.QSize(370, 230))
+        Dialog.resize(370, 250)
+        Dialog.setMinimumSize(QtCore.QSize(370, 250))
+        Dialog.setMaximumSize(QtCore.QSize(370, 250))
+        self.zero_phase_chkbox = QtWidgets.QCheckBox(parent=Dialog)
+        self.zero_phase_chkbox.setGeometry(QtCore.QRect(20, 160, 331, 22))
+        self.zero_phase_chkbox.setObjectName("zero_phase_chkbox")
         self.dialog_btnbox = QtWidgets.QDialogButtonBox(parent=Dialog)
-        self.dialog_btnbox.setGeometry(QtCore.QRect(80, 180, 191, 28))
+        self.dialog_btnbox.setGeometry(QtCore.QRect(80, 200, 191, 28))
         self.dialog_btnbox.setStandardButtons(QtWidgets.QDialogButtonBox.StandardButton.Cancel|QtWidgets.QDialogButtonBox.StandardButton.Ok)
         self.dialog_btnbox.setObjectName("dialog_btnbox")
         self.widget = QtWidgets.QWidget(parent=Dialog)
@@ -88,6 +91,7 @@ class Ui_Dialog(object):
     def retranslateUi(self, Dialog):
         _translate = QtCore.QCoreApplication.translate
         Dialog.setWindowTitle(_translate("Dialog", "Фильтр Баттерворта"))
+        self.zero_phase_chkbox.setText(_translate("Dialog", "Без фазового сдвига (прямой и обратный проход)"))
         self.label_4.setText(_translate("Dialog", "Тип фильтра"))
         self.radioButton.setText(_translate("Dialog", "Lowpass"))
         self.radioButton_2.setText(_translate("Dialog", "Highpass"))
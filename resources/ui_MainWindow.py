@@ -47,7 +47,7 @@ class Ui_MainForm(object):
         spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
         self.horizontalLayout.addItem(spacerItem)
         self.verticalLayout.addLayout(self.horizontalLayout)
-        self.seismogram_list = QtWidgets.QListWidget(parent=MainForm)
+        self.seismogram_list = SeismogramListWidget(parent=MainForm)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Expanding)
         sizePolicy.setHorizontalStretch(0)
         sizePolicy.setVerticalStretch(0)
@@ -61,14 +61,42 @@ class Ui_MainForm(object):
         self.reset_filters_btn = QtWidgets.QPushButton(parent=MainForm)
         self.reset_filters_btn.setObjectName("reset_filters_btn")
         self.verticalLayout_3.addWidget(self.reset_filters_btn)
+        self.undo_filter_btn = QtWidgets.QPushButton(parent=MainForm)
+        self.undo_filter_btn.setObjectName("undo_filter_btn")
+        self.verticalLayout_3.addWidget(self.undo_filter_btn)
+        self.filters_btn = QtWidgets.QPushButton(parent=MainForm)
+        self.filters_btn.setObjectName("filters_btn")
+        self.verticalLayout_3.addWidget(self.filters_btn)
         self.apply_filter_btn = QtWidgets.QPushButton(parent=MainForm)
         self.apply_filter_btn.setObjectName("apply_filter_btn")
         self.verticalLayout_3.addWidget(self.apply_filter_btn)
         self.apply_NN_btn = QtWidgets.QPushButton(parent=MainForm)
         self.apply_NN_btn.setObjectName("apply_NN_btn")
         self.verticalLayout_3.addWidget(self.apply_NN_btn)
+        self.cancel_NN_btn = QtWidgets.QPushButton(parent=MainForm)
+        self.cancel_NN_btn.setEnabled(False)
+        self.cancel_NN_btn.setObjectName("cancel_NN_btn")
+        self.verticalLayout_3.addWidget(self.cancel_NN_btn)
         spacerItem1 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Expanding)
         self.verticalLayout_3.addItem(spacerItem1)
+        self.load_progress_bar = QtWidgets.QProgressBar(parent=MainForm)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.load_progress_bar.sizePolicy().hasHeightForWidth())
+        self.load_progress_bar.setSizePolicy(sizePolicy)
+        self.load_progress_bar.setProperty("value", 0)
+        self.load_progress_bar.setObjectName("load_progress_bar")
+        self.verticalLayout_3.addWidget(self.load_progress_bar)
+        self.filter_progress_bar = QtWidgets.QProgressBar(parent=MainForm)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.filter_progress_bar.sizePolicy().hasHeightForWidth())
+        self.filter_progress_bar.setSizePolicy(sizePolicy)
+        self.filter_progress_bar.setProperty("value", 0)
+        self.filter_progress_bar.setObjectName("filter_progress_bar")
+        self.verticalLayout_3.addWidget(self.filter_progress_bar)
         self.progress_bar = QtWidgets.QProgressBar(parent=MainForm)
         self.progress_bar.setEnabled(True)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Fixed)
@@ -94,5 +122,9 @@ class Ui_MainForm(object):
         self.invert_selection_btn.setText(_translate("MainForm", "Инвертировать выбранные"))
         self.save_results_btn.setText(_translate("MainForm", "Сохранить выбранные"))
         self.reset_filters_btn.setText(_translate("MainForm", "Сбросить фильтрацию и НС"))
+        self.undo_filter_btn.setText(_translate("MainForm", "Отменить последний фильтр"))
+        self.filters_btn.setText(_translate("MainForm", "Включенные фильтры"))
         self.apply_filter_btn.setText(_translate("MainForm", "Применить фильтрацию"))
         self.apply_NN_btn.setText(_translate("MainForm", "Применить НС"))
+        self.cancel_NN_btn.setText(_translate("MainForm", "Отменить НС"))
+from SeismogramListWidget import SeismogramListWidget
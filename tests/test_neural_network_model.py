@@ -0,0 +1,76 @@
+import importlib.util
+import os
+import unittest
+
+import numpy as np
+
+HAS_TENSORFLOW = importlib.util.find_spec("tensorflow") is not None
+WEIGHTS_PATH = "resources/mymodel_3_15.h5"
+
+
+class ScaledSeismogram:
+    """
+    Random walk traces of a given length and amplitude with the attributes NeuralNetworkModel reads
+    """
+
+    def __init__(self, samples_count, amplitude, seed):
+        self.traces = amplitude * np.random.default_rng(seed).standard_normal((3, samples_count)).cumsum(axis=1)
+        self.data_hash = None
+        self.filters = []
+
+    def snapshot(self):
+        return tuple(self.filters), self.traces
+
+
+@unittest.skipUnless(HAS_TENSORFLOW, "tensorflow is not installed")
+class WindowSequenceTest(unittest.TestCase):
+
+    def test_batches_never_mix_seismograms(self):
+        from NeuralNetworkModel import WindowSequence
+        windows = [np.full((count, 2), seismogram + 1, dtype=np.float32)
+                   for seismogram, count in enumerate((5, 8, 3, 0))]
+        sequence = WindowSequence(windows, 4)
+        self.assertEqual(len(sequence), 2 + 2 + 1)
+        batches = [sequence[index] for index in range(len(sequence))]
+        for batch in batches:
+            self.assertEqual(len(batch), 4)
+            self.assertEqual(len(np.unique(batch)), 1)
+        for expected, split in zip(windows, sequence.split(np.concatenate(batches))):
+            np.testing.assert_array_equal(expected, split)
+
+
+@unittest.skipUnless(HAS_TENSORFLOW, "tensorflow is not installed")
+class ProgressCallbackTest(unittest.TestCase):
+
+    def test_progress_stays_within_its_range(self):
+        from NeuralNetworkModel import ProgressCallback
+        reported = []
+        callback = ProgressCallback(reported.append, lambda: False)
+        callback.set_params({"steps": 4})
+        for progress_range in ((0, 20), (20, 100)):
+            callback.progress_range = progress_range
+            callback.on_predict_begin()
+            for batch in range(4):
+                callback.on_predict_batch_end(batch)
+        self.assertEqual([0, 5, 10, 15, 20, 20, 40, 60, 80, 100], reported)
+
+
+@unittest.skipUnless(HAS_TENSORFLOW and os.path.exists(WEIGHTS_PATH), "tensorflow or the model weights are missing")
+class NeuralNetworkModelTest(unittest.TestCase):
+
+    def test_prediction_does_not_depend_on_other_seismograms(self):
+        from NeuralNetworkModel import NeuralNetworkModel
+        seismogram = ScaledSeismogram(6543, 1, 0)
+        others = [ScaledSeismogram(12345, 1000, 1), ScaledSeismogram(777, 0.001, 2)]
+        for shared_stft in (False, True):
+            with self.subTest(shared_stft=shared_stft):
+                model = NeuralNetworkModel(shared_stft=shared_stft)
+                alone, _, _ = model.get_predictions([seismogram], callbacks=[])[0]
+                together, _, _ = model.get_predictions([others[0], seismogram, others[1]], callbacks=[])[1]
+                reordered, _, _ = model.get_predictions([others[1], others[0], seismogram], callbacks=[])[2]
+                np.testing.assert_allclose(together, alone, rtol=1e-5, atol=1e-6)
+                np.testing.assert_allclose(reordered, alone, rtol=1e-5, atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
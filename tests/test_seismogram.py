@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import obspy
+
+from Seismogram import Seismogram
+from StageCache import StageCache
+
+
+class SeismogramFiltersTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        stream = obspy.Stream([obspy.Trace(rng.standard_normal(6000).astype(np.float32),
+                                           {"network": "XX", "station": "TST", "channel": channel,
+                                            "sampling_rate": 100, "starttime": obspy.UTCDateTime(2024, 1, 1)})
+                               for channel in ("HHE", "HHN", "HHZ")])
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "test.mseed")
+            stream.write(file_path, format="MSEED")
+            self.seismogram = Seismogram.read_file(file_path)[0]
+        self.seismogram.stage_cache = StageCache()
+        self.seismogram.apply_filter(4, [1, 10], "bandpass")
+        self.seismogram.apply_filter(2, 20, "lowpass", zero_phase=True)
+
+    def evaluate_from_cache(self):
+        """
+        The traces, failing if any filter has to run again
+        """
+        with mock.patch.object(Seismogram, "filter_traces", side_effect=AssertionError("filtered again")), \
+                mock.patch.object(self.seismogram.stage_cache, "longest_prefix",
+                                  wraps=self.seismogram.stage_cache.longest_prefix) as longest_prefix:
+            traces = self.seismogram.traces
+        longest_prefix.assert_called_once()
+        return traces
+
+    def test_toggling_a_filter_back_on_is_a_cache_lookup(self):
+        filtered = self.seismogram.traces
+        self.seismogram.set_filter_enabled(0, False)
+        self.assertEqual([(2, 20.0, "lowpass", True)], self.seismogram.filters)
+        without_first = self.seismogram.traces
+        self.assertFalse(np.array_equal(filtered, without_first))
+
+        self.seismogram.set_filter_enabled(0, True)
+        self.assertIs(filtered, self.evaluate_from_cache())
+        self.seismogram.set_filter_enabled(0, False)
+        self.assertIs(without_first, self.evaluate_from_cache())
+
+    def test_undo_is_a_cache_lookup(self):
+        self.seismogram.traces
+        self.seismogram.undo_filter()
+        expected = Seismogram.filter_traces(Seismogram.design_filter(4, [1, 10], "bandpass"),
+                                            self.seismogram.base_traces)
+        np.testing.assert_array_equal(expected, self.evaluate_from_cache())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+import numpy as np
+
+from ModelParameters import ModelParameters
+from StreamingDetector import StreamingDetector
+
+RECORD_SAMPLES = 1000
+
+
+class EnergyModel:
+    """
+    Stands in for NeuralNetworkModel with its window geometry: the P and S probabilities of a window grow with the
+    energy of the N and E channels times that of Z, so they change when the channels are shifted against each other
+    """
+    batch_size = ModelParameters.BATCH_SIZE
+    WAVE_LENGTH = ModelParameters.WAVE_LENGTH
+    DELTA_X = ModelParameters.DELTA_X
+    NUMBER_OF_TRACES = ModelParameters.NUMBER_OF_TRACES
+
+    def predict_windows(self, windows):
+        energy = np.mean(windows ** 2, axis=1)
+        prediction = np.zeros((len(windows), 3), dtype=np.float32)
+        prediction[:, 0] = np.tanh(energy[:, 0] * energy[:, 2])
+        prediction[:, 1] = np.tanh(energy[:, 1] * energy[:, 2])
+        return prediction
+
+
+class StreamingDetectorTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.traces = 0.5 * rng.standard_normal((3, 30 * RECORD_SAMPLES)).astype(np.float32)
+        # bursts of energy on every channel for the detector to pick
+        for center in range(1500, self.traces.shape[1], 3700):
+            self.traces[:, center - 100:center + 100] *= 1 + 0.05 * rng.integers(20, 60, size=(3, 1))
+        self.start_time = 1000.0
+
+    def pick_all(self, records, max_lag_seconds=StreamingDetector.MAX_LAG_SECONDS):
+        detector = StreamingDetector(EnergyModel(), self.start_time, 0.5, 0.5, 0.8, max_lag_seconds)
+        picks = []
+        for channel, first, last in records:
+            samples_by_channel = [None] * 3
+            samples_by_channel[channel] = self.traces[channel, first:last]
+            picks.extend(detector.append(samples_by_channel, self.start_time + first / 100))
+            self.assertLessEqual(max(len(samples) for samples in detector.pending),
+                                 detector.max_lag + RECORD_SAMPLES)
+        picks.extend(detector.finish())
+        return [(pick.phase, pick.window_index, pick.probability) for pick in picks], detector.filled_samples
+
+    def reference(self, traces):
+        detector = StreamingDetector(EnergyModel(), self.start_time)
+        picks = detector.append(list(traces), self.start_time) + detector.finish()
+        return [(pick.phase, pick.window_index, pick.probability) for pick in picks]
+
+    def records(self, channel, first, last):
+        return [(channel, start, min(start + RECORD_SAMPLES, last)) for start in range(first, last, RECORD_SAMPLES)]
+
+    def test_records_arriving_one_channel_at_a_time(self):
+        expected = self.reference(self.traces)
+        self.assertGreater(len(expected), 4)
+        records = []
+        # the channels take turns sending up to three records each, so one is often several records ahead
+        for first in range(0, self.traces.shape[1], 3 * RECORD_SAMPLES):
+            for channel in (2, 0, 1):
+                records.extend(self.records(channel, first, first + 3 * RECORD_SAMPLES))
+        picks, filled_samples = self.pick_all(records)
+        self.assertEqual([0, 0, 0], filled_samples)
+        self.assertEqual(expected, picks)
+
+    def test_stalled_channel_resumes_in_place(self):
+        lost_first, lost_last = 5 * RECORD_SAMPLES, 20 * RECORD_SAMPLES
+        records = []
+        for first in range(0, self.traces.shape[1], RECORD_SAMPLES):
+            for channel in range(3):
+                if channel != 2 or not lost_first <= first < lost_last:
+                    records.extend(self.records(channel, first, first + RECORD_SAMPLES))
+            if first == 25 * RECORD_SAMPLES:
+                # the records missed during the stall arrive late, over the span already filled with zeros
+                records.extend(self.records(2, lost_first, lost_last))
+        picks, filled_samples = self.pick_all(records, max_lag_seconds=50)
+
+        traces = self.traces.copy()
+        traces[2, lost_first:lost_last] = 0
+        self.assertEqual([0, 0, lost_last - lost_first], filled_samples)
+        self.assertEqual(self.reference(traces), picks)
+
+
+if __name__ == '__main__':
+    unittest.main()